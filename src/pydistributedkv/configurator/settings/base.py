@@ -3,10 +3,33 @@ import os
 # API timeouts in seconds
 API_TIMEOUT = int(os.getenv("API_TIMEOUT", "5"))
 
+# Logging level for the leader and follower apps, e.g. WARNING in production to skip per-request INFO logs
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
 # Log segmentation settings
 # Default max segment size: 1MB
 MAX_SEGMENT_SIZE = int(os.getenv("MAX_SEGMENT_SIZE", str(1024 * 1024)))
 
+# WAL durability: fsync each group commit, optionally waiting a few microseconds for more writers to join it
+WAL_FSYNC = os.getenv("WAL_FSYNC", "true").lower() == "true"
+WAL_GROUP_COMMIT_DELAY_US = int(os.getenv("WAL_GROUP_COMMIT_DELAY_US", "0"))
+WAL_MAX_BATCH_BYTES = int(os.getenv("WAL_MAX_BATCH_BYTES", str(1024 * 1024)))
+
+# Replication batching: a write waits up to half a follower round trip, capped at this window, for more to share
+# its /replicate request, up to a batch size
+REPLICATION_BATCH_WINDOW_US = int(os.getenv("REPLICATION_BATCH_WINDOW_US", "5000"))
+REPLICATION_MAX_BATCH = int(os.getenv("REPLICATION_MAX_BATCH", "256"))
+# Unacknowledged /replicate requests allowed per follower; above 1, batches can arrive out of order and
+# followers reject them until the earlier ones are in, so they are retried
+REPLICATION_MAX_IN_FLIGHT = int(os.getenv("REPLICATION_MAX_IN_FLIGHT", "1"))
+
+# Follower catch-up: entries fetched per page, and pages fetched ahead of the WAL append
+SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "1000"))
+SYNC_PREFETCH_PAGES = int(os.getenv("SYNC_PREFETCH_PAGES", "4"))
+
+# Previous versions kept in memory per key
+VERSION_HISTORY_DEPTH = int(os.getenv("VERSION_HISTORY_DEPTH", "100"))
+
 # Heartbeat configuration
 HEARTBEAT_INTERVAL = int(os.getenv("HEARTBEAT_INTERVAL", 10))  # seconds
 HEARTBEAT_TIMEOUT = HEARTBEAT_INTERVAL * 3  # After this many seconds with no heartbeat, mark server as down
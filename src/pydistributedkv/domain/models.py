@@ -1,11 +1,26 @@
-import glob
 import json
+import logging
+import math
+import mmap
+import multiprocessing
 import os
+import re
+import threading
+import time
 import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from enum import Enum
-from typing import Any, Dict, List, Optional, Set, Tuple
+from operator import itemgetter
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from pydantic import BaseModel
+import google_crc32c
+import orjson
+from pydantic import BaseModel, PrivateAttr, TypeAdapter, ValidationError
+
+logger = logging.getLogger(__name__)
 
 
 class OperationType(str, Enum):
@@ -14,6 +29,136 @@ class OperationType(str, Enum):
     GET = "GET"
 
 
+# Fields covered by an entry's CRC, i.e. everything except the CRC itself
+_CRC_FIELDS = ("id", "operation", "key", "value", "version")
+# Fields every entry line must carry to be usable without Pydantic validation
+_REQUIRED_FIELDS = frozenset(("id", "operation", "key"))
+
+
+def _canonical_bytes(entry_id: int, operation: str, key: str, value: Any, version: Optional[int]) -> bytes:
+    """Build the byte string an entry's CRC is calculated over.
+
+    The fields are joined in a fixed order, so no dict is copied or sorted. Only the value goes
+    through orjson, with sorted keys so that nested dicts hash the same after a round-trip.
+    """
+    return _join_canonical(entry_id, operation, key, orjson.dumps(value, option=orjson.OPT_SORT_KEYS), version)
+
+
+def _join_canonical(entry_id: int, operation: str, key: str, value_json: bytes, version: Optional[int]) -> bytes:
+    return b"|".join((b"%d" % entry_id, operation.encode(), key.encode(), value_json, b"" if version is None else b"%d" % version))
+
+
+def _has_non_finite_float(value: Any) -> bool:
+    """Whether a value holds NaN or an infinity anywhere, including inside nested lists and dicts."""
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(map(_has_non_finite_float, value.values()))
+    if isinstance(value, (list, tuple)):
+        return any(map(_has_non_finite_float, value))
+    return False
+
+
+def _encode_entry_line(entry_id: int, operation: str, key: str, value: Any, version: Optional[int]) -> Tuple[bytes, int]:
+    """Serialize a new entry's log line together with its CRC, encoding the value once for both."""
+    value_json = orjson.dumps(value, option=orjson.OPT_SORT_KEYS)
+    # orjson writes NaN and infinities as null, so the log and every follower would hold a different value;
+    # only a value that encoded to some null can hold one, which keeps the check off the common path
+    if b"null" in value_json and _has_non_finite_float(value):
+        raise orjson.JSONEncodeError("NaN and infinite floats cannot be stored as JSON")
+    crc = google_crc32c.value(_join_canonical(entry_id, operation, key, value_json, version))
+    line = b'{"id":%d,"operation":%s,"key":%s,"value":%s,"version":%s,"crc":%d}\n' % (
+        entry_id,
+        orjson.dumps(operation),
+        orjson.dumps(key),
+        value_json,
+        b"null" if version is None else b"%d" % version,
+        crc,
+    )
+    return line, crc
+
+
+def _serialize_for_crc(entry_dict: Dict[str, Any]) -> bytes:
+    """Build the CRC preimage of an entry dict, whose operation may be an enum or its string value."""
+    operation = entry_dict["operation"]
+    return _canonical_bytes(
+        entry_dict["id"], getattr(operation, "value", operation), entry_dict["key"], entry_dict.get("value"), entry_dict.get("version")
+    )
+
+
+def _calculate_crc(entry_dict: Dict[str, Any]) -> int:
+    """Calculate the CRC-32C (Castagnoli) of an entry dict, hardware accelerated where the CPU supports it."""
+    return google_crc32c.value(_serialize_for_crc(entry_dict))
+
+
+def _calculate_sorted_json_crc(entry_dict: Dict[str, Any]) -> int:
+    """Calculate the CRC-32C over sorted-key JSON, as entries were checksummed before the fixed field layout."""
+    data_for_crc = {field: entry_dict.get(field) for field in _CRC_FIELDS}
+    return google_crc32c.value(orjson.dumps(data_for_crc, option=orjson.OPT_SORT_KEYS))
+
+
+def _calculate_legacy_crc(entry_dict: Dict[str, Any]) -> int:
+    """Calculate the CRC the way older WAL versions did (zlib CRC-32 over stdlib json with default separators)."""
+    data_for_crc = {field: entry_dict.get(field) for field in _CRC_FIELDS}
+    return zlib.crc32(json.dumps(data_for_crc, sort_keys=True).encode())
+
+
+# Current scheme first, older ones only consulted for entries written before it
+_CRC_SCHEMES = (_calculate_crc, _calculate_sorted_json_crc, _calculate_legacy_crc)
+_LEGACY_CRC_SCHEMES = _CRC_SCHEMES[1:]
+
+
+def _validate_crc(entry_dict: Dict[str, Any], schemes: Tuple[Callable[[Dict[str, Any]], int], ...] = _CRC_SCHEMES) -> bool:
+    """Validate that the CRC stored in an entry dict matches its content under one of the given schemes."""
+    crc = entry_dict.get("crc")
+    if crc is None:
+        return False
+    try:
+        return any(crc == scheme(entry_dict) for scheme in schemes)
+    except (AttributeError, KeyError, TypeError):
+        # Fields of the wrong type cannot match any CRC
+        return False
+
+
+_ID_MARKER = b'"id":'
+_ID_VALUE = re.compile(rb"\s*(\d+)")
+
+
+def _fast_extract_id(line: bytes) -> Optional[int]:
+    """Extract an entry's id without decoding its JSON, or None if the line is torn or has no id."""
+    if not line.rstrip().endswith(b"}"):
+        return None
+    start = line.find(_ID_MARKER)
+    if start < 0:
+        return None
+    # Entries are written with "id" as their first field, so this cannot be a match inside a string value
+    match = _ID_VALUE.match(line, start + len(_ID_MARKER))
+    return int(match.group(1)) if match else None
+
+
+_SEGMENT_NUMBER = re.compile(r"\.segment\.(\d+)$")
+
+# Not every platform exposes madvise hints
+_MADV_SEQUENTIAL = getattr(mmap, "MADV_SEQUENTIAL", None)
+
+
+def _iter_file_lines(file_path: str, start: int = 0) -> Iterator[Tuple[int, bytes]]:
+    """Yield (offset, line) for every line of a file from start, finding newlines with bytes.find over a read-only mmap."""
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return  # an empty file cannot be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if _MADV_SEQUENTIAL is not None:
+                # Segments are scanned front to back, so let the kernel read ahead aggressively
+                mm.madvise(_MADV_SEQUENTIAL)
+            while start < size:
+                # The last line may have no trailing newline
+                end = mm.find(b"\n", start) + 1 or size
+                yield start, mm[start:end]
+                start = end
+
+
 class LogEntry(BaseModel):
     id: int
     operation: OperationType
@@ -22,20 +167,70 @@ class LogEntry(BaseModel):
     crc: Optional[int] = None
     version: Optional[int] = None  # Version number for the key
 
+    # CRC of the current field values, computed once and dropped whenever a field other than crc is reassigned
+    _content_crc: Optional[int] = PrivateAttr(default=None)
+    # JSON encoding of the entry, kept until any field is reassigned; the WAL seeds it with the line it wrote
+    _json_bytes: Optional[bytes] = PrivateAttr(default=None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if not name.startswith("_"):
+            self._json_bytes = None
+            if name != "crc":
+                self._content_crc = None
+
+    def to_raw_dict(self) -> Dict[str, Any]:
+        """Build the plain dict form of this entry directly, skipping model_dump's generic serializer."""
+        return {
+            "id": self.id,
+            "operation": self.operation.value,
+            "key": self.key,
+            "value": self.value,
+            "version": self.version,
+            "crc": self.crc,
+        }
+
+    def to_json_bytes(self) -> bytes:
+        """Serialize this entry to JSON, encoding it only once however many times it is sent."""
+        if self._json_bytes is None:
+            self._json_bytes = orjson.dumps(self.to_raw_dict())
+        return self._json_bytes
+
+    def _canonical_bytes(self) -> bytes:
+        return _canonical_bytes(self.id, self.operation.value, self.key, self.value, self.version)
+
     def calculate_crc(self) -> int:
         """Calculate CRC for this entry based on its content except the CRC itself."""
-        # Create a copy of the entry without the CRC field
-        data_for_crc = self.model_dump()
-        data_for_crc.pop("crc", None)
-        # Convert to a stable string representation and calculate CRC32
-        json_str = json.dumps(data_for_crc, sort_keys=True)
-        return zlib.crc32(json_str.encode())
+        if self._content_crc is None:
+            self._content_crc = google_crc32c.value(self._canonical_bytes())
+        return self._content_crc
 
     def validate_crc(self) -> bool:
         """Validate that the stored CRC matches the calculated one."""
         if self.crc is None:
             return False
-        return self.crc == self.calculate_crc()
+        # Hash the fields directly; only entries written under an older scheme need the dict form
+        return self.crc == self.calculate_crc() or _validate_crc(self.to_raw_dict(), _LEGACY_CRC_SCHEMES)
+
+
+# Validates a whole batch of entry dicts in one call, amortizing the schema traversal
+LOG_ENTRY_LIST_ADAPTER = TypeAdapter(List[LogEntry])
+
+
+def _build_log_entries(entry_dicts: List[Dict[str, Any]]) -> List[LogEntry]:
+    """Build LogEntry models in bulk, falling back to one at a time to skip only the malformed ones."""
+    try:
+        return LOG_ENTRY_LIST_ADAPTER.validate_python(entry_dicts)
+    except ValidationError:
+        return [entry for entry in map(_build_log_entry, entry_dicts) if entry is not None]
+
+
+def _build_log_entry(entry_dict: Dict[str, Any]) -> Optional[LogEntry]:
+    try:
+        return LogEntry(**entry_dict)
+    except ValueError as e:
+        logger.warning("Error parsing log entry: %s", e)
+        return None
 
 
 class KeyValue(BaseModel):
@@ -63,8 +258,8 @@ class VersionedValue(BaseModel):
 
         return None
 
-    def update(self, value: Any, version: int) -> None:
-        """Update with a new value and version"""
+    def update(self, value: Any, version: int, max_history: Optional[int] = None) -> None:
+        """Update with a new value and version, keeping at most max_history previous versions if given"""
         if version <= self.current_version:
             # Ignore updates with older versions
             return
@@ -73,8 +268,10 @@ class VersionedValue(BaseModel):
         if self.history is None:
             self.history = {}
 
-        # Always keep history of previous versions
+        # Keep history of previous versions; versions only grow, so the first key is the oldest
         self.history[self.current_version] = self.value
+        if max_history is not None and len(self.history) > max_history:
+            del self.history[next(iter(self.history))]
 
         self.value = value
         self.current_version = version
@@ -100,225 +297,862 @@ class ReplicationRequest(BaseModel):
     entries: list[dict[str, Any]]
 
 
+class LogEntryBatch(BaseModel):
+    """A batch of log entries as served by the leader's /log_entries endpoint"""
+
+    entries: list[LogEntry]
+
+
 class FollowerRegistration(BaseModel):
     id: str
     url: str
     last_applied_id: int = 0
 
 
+class IdIntervalSet:
+    """Set of integer IDs stored as sorted, non-overlapping [start, end] ranges.
+
+    WAL IDs are assigned sequentially, so even millions of IDs collapse into a handful of ranges.
+    IDs arriving out of order become single-ID ranges that coalesce once the gaps between them fill.
+    Bounds are kept in int64 arrays, 8 bytes each rather than a pointer plus an int object.
+    """
+
+    def __init__(self, intervals: Optional[List[List[int]]] = None):
+        self._starts = array("q")
+        self._ends = array("q")
+        for start, end in intervals or []:
+            self.add_range(start, end)
+
+    def add(self, entry_id: int) -> None:
+        # Fast path: the next sequential ID extends the last range
+        if self._ends and self._ends[-1] == entry_id - 1:
+            self._ends[-1] = entry_id
+            return
+        self.add_range(entry_id, entry_id)
+
+    def add_range(self, start: int, end: int) -> None:
+        """Add all IDs from start to end (inclusive), merging with overlapping or adjacent ranges."""
+        first = bisect_left(self._ends, start - 1)
+        last = bisect_right(self._starts, end + 1)
+        if first < last:
+            start = min(start, self._starts[first])
+            end = max(end, self._ends[last - 1])
+        self._starts[first:last] = array("q", (start,))
+        self._ends[first:last] = array("q", (end,))
+
+    def update(self, other: "IdIntervalSet") -> None:
+        for start, end in other.intervals():
+            self.add_range(start, end)
+
+    def intervals(self) -> List[List[int]]:
+        return [[start, end] for start, end in zip(self._starts, self._ends, strict=True)]
+
+    def min(self) -> int:
+        return self._starts[0] if self._starts else 0
+
+    def max(self) -> int:
+        return self._ends[-1] if self._ends else 0
+
+    def __contains__(self, entry_id: int) -> bool:
+        # Most lookups are for recent IDs: past the end, or inside the last (usually only) range
+        if not self._ends or entry_id > self._ends[-1]:
+            return False
+        if entry_id >= self._starts[-1]:
+            return True
+        i = bisect_right(self._starts, entry_id)
+        return i > 0 and entry_id <= self._ends[i - 1]
+
+    def __len__(self) -> int:
+        return sum(end - start + 1 for start, end in zip(self._starts, self._ends, strict=True))
+
+
+class LineCheckpoints:
+    """Sparse (highest ID so far, byte offset) pairs for a segment, so reads can start part way through it.
+
+    A checkpoint is taken every CHECKPOINT_INTERVAL lines, before the line at its offset. Its ID is
+    the highest one in all lines before that offset, so reads of higher IDs can skip to it even
+    when entries were written out of order.
+    """
+
+    CHECKPOINT_INTERVAL = 64
+
+    def __init__(self):
+        self._max_ids = array("q")
+        self._offsets = array("q")
+        self._max_id = 0
+        self._lines = 0
+
+    def add(self, offset: int, entry_id: int) -> None:
+        """Record a line with the given ID starting at offset."""
+        if self._lines % self.CHECKPOINT_INTERVAL == 0:
+            self._mark(offset)
+        self._lines += 1
+        self._max_id = max(self._max_id, entry_id)
+
+    def _mark(self, offset: int) -> None:
+        # Offsets first: a concurrent reader bisects _max_ids and must find the matching offset
+        self._offsets.append(offset)
+        self._max_ids.append(self._max_id)
+
+    def start_offset(self, start_id: int) -> int:
+        """Return the furthest offset before which every line has an ID below start_id."""
+        i = bisect_left(self._max_ids, start_id)
+        return self._offsets[i - 1] if i > 0 else 0
+
+
+class SegmentSummary:
+    """Summary of a sealed segment, persisted in the WAL's sidecar index so startup can skip scanning it"""
+
+    def __init__(self, ids: IdIntervalSet, size: int, mtime_ns: int, crc: Optional[int] = None):
+        self.ids = ids
+        self.size = size
+        self.mtime_ns = mtime_ns
+        # CRC-32C of the whole file, only known when every line in it was valid when it was sealed
+        self.crc = crc
+
+    @classmethod
+    def from_ids(cls, segment_path: str, entry_ids: IdIntervalSet, crc: Optional[int] = None) -> "SegmentSummary":
+        """Build the summary of a segment file from the IDs of its valid entries."""
+        stat = os.stat(segment_path)
+        return cls(entry_ids, stat.st_size, stat.st_mtime_ns, crc)
+
+    def matches_file(self, segment_path: str) -> bool:
+        """Check that the segment file hasn't changed since the summary was built."""
+        try:
+            stat = os.stat(segment_path)
+        except OSError:
+            return False
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"ids": self.ids.intervals(), "size": self.size, "mtime_ns": self.mtime_ns, "crc": self.crc}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SegmentSummary":
+        return cls(IdIntervalSet(data["ids"]), data["size"], data["mtime_ns"], data.get("crc"))
+
+
+_FILE_CRC_CHUNK_SIZE = 1024 * 1024
+
+
+def _file_crc(file_path: str) -> int:
+    """Calculate the CRC-32C of a whole file, reading it in chunks."""
+    crc = 0
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_FILE_CRC_CHUNK_SIZE), b""):
+            crc = google_crc32c.extend(crc, chunk)
+    return crc
+
+
+# Most buffers a single writev call accepts (IOV_MAX on Linux and macOS)
+_IOV_MAX = 1024
+# Platforms without writev (Windows) fall back to joining the buffers
+_writev = getattr(os, "writev", lambda fd, buffers: os.write(fd, b"".join(buffers)))
+# fdatasync skips metadata that reading the data back doesn't need, such as timestamps; macOS and Windows lack it
+_fdatasync = getattr(os, "fdatasync", os.fsync)
+
+
+def _writev_all(fd: int, buffers: List[bytes]) -> None:
+    """Write all buffers with as few writev calls as possible, resuming after short writes."""
+    views = [memoryview(buffer) for buffer in buffers if buffer]
+    start = 0
+    while start < len(views):
+        written = _writev(fd, views[start : start + _IOV_MAX])
+        start = _skip_written(views, start, written)
+
+
+def _skip_written(views: List[memoryview], start: int, written: int) -> int:
+    """Advance past fully written views and trim a partially written one; returns the next view to write."""
+    while written and written >= len(views[start]):
+        written -= len(views[start])
+        start += 1
+    if written:
+        views[start] = views[start][written:]
+    return start
+
+
+def _write_lines(fd: int, lines: Iterable[bytes]) -> None:
+    """Write a stream of lines, submitting up to _IOV_MAX of them per writev call."""
+    batch: List[bytes] = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) == _IOV_MAX:
+            _writev_all(fd, batch)
+            batch = []
+    _writev_all(fd, batch)
+
+
+# Rescanning fewer stale segments than this is cheaper than starting worker processes
+_PARALLEL_SCAN_MIN_SEGMENTS = 4
+
+
+def _extract_valid_id(line: bytes) -> Optional[int]:
+    """Decode a log entry line and return its ID if the entry is valid."""
+    try:
+        entry = orjson.loads(line)
+        entry_id = entry["id"]
+    except (orjson.JSONDecodeError, KeyError, TypeError):
+        return None
+
+    if "crc" in entry and not _validate_crc(entry):
+        logger.warning("Entry with ID %s has invalid CRC, skipping", entry_id)
+        return None
+    return entry_id
+
+
+def _scan_entry_ids(file_path: str, extract_id: Callable[[bytes], Optional[int]] = _extract_valid_id) -> IdIntervalSet:
+    """Collect the IDs of a segment file's entries; module level so it can run in a worker process."""
+    entry_ids = IdIntervalSet()
+    try:
+        for _, line in _iter_file_lines(file_path):
+            entry_id = extract_id(line)
+            if entry_id is not None:
+                entry_ids.add(entry_id)
+    except FileNotFoundError:
+        pass
+    return entry_ids
+
+
+class _PendingWrite:
+    """Buffers queued for the group committer, plus the event their writer waits on."""
+
+    __slots__ = ("buffers", "size", "done", "error")
+
+    def __init__(self, buffers: List[bytes]):
+        self.buffers = buffers
+        self.size = sum(map(len, buffers))
+        self.done = threading.Event()
+        self.error: Optional[Exception] = None
+
+
+class GroupCommitter:
+    """Batch appends from concurrent writers into a single write (and fsync) on a background thread.
+
+    Writers submit their bytes and block until the batch containing them is on disk, so N concurrent
+    appends cost one fsync instead of N. A failed batch is truncated off the file and fails every write
+    queued behind it, since those were staged on top of it; submissions are then refused until reset().
+    """
+
+    def __init__(self, fsync: bool = True, max_batch_bytes: int = 1024 * 1024, commit_delay: float = 0.0):
+        self.fsync = fsync
+        self.max_batch_bytes = max_batch_bytes
+        self.commit_delay = commit_delay  # seconds to wait for more writers before committing a batch
+        self._file: Optional[BinaryIO] = None
+        self._pending: List[_PendingWrite] = []
+        self._condition = threading.Condition()
+        self._running = True
+        self._committed_size = 0  # bytes of the current file known to be written
+        self.failure: Optional[Exception] = None
+        self._thread = threading.Thread(target=self._run, name="wal-group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, data: bytes) -> _PendingWrite:
+        """Queue data for the next batch without waiting for it to be written."""
+        return self.submit_many([data])
+
+    def submit_many(self, buffers: List[bytes]) -> _PendingWrite:
+        """Queue several buffers as one write, so they are committed in the same batch."""
+        pending = _PendingWrite(buffers)
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("Group committer is closed")
+            if self.failure is not None:
+                raise OSError(f"WAL write failed and was not recovered yet: {self.failure}")
+            self._pending.append(pending)
+            self._condition.notify()
+        return pending
+
+    @staticmethod
+    def wait(pending: _PendingWrite) -> None:
+        """Block until a submitted write is committed, re-raising any error from the writer thread."""
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+
+    def flush(self) -> None:
+        """Block until everything submitted so far has been committed."""
+        if self._running:
+            self.wait(self.submit(b""))
+
+    def switch_file(self, file: BinaryIO) -> None:
+        """Commit pending writes to the current file, then direct later batches to the given one."""
+        self.flush()
+        with self._condition:
+            self._file = file
+            self._committed_size = os.fstat(file.fileno()).st_size
+
+    def reset(self) -> None:
+        """Accept writes again after a failure, once the caller has resynchronized with the file."""
+        with self._condition:
+            self.failure = None
+
+    def close(self) -> None:
+        """Commit pending writes and stop the writer thread."""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while self._wait_for_pending():
+            if self.commit_delay:
+                # Give concurrent writers a chance to join this batch
+                time.sleep(self.commit_delay)
+            self._commit(self._take_batch())
+
+    def _wait_for_pending(self) -> bool:
+        """Wait for queued writes; returns False once closed and drained."""
+        with self._condition:
+            while not self._pending and self._running:
+                self._condition.wait()
+            return bool(self._pending)
+
+    def _take_batch(self) -> List[_PendingWrite]:
+        """Dequeue pending writes in order, up to max_batch_bytes (always at least one)."""
+        with self._condition:
+            count = size = 0
+            for pending in self._pending:
+                count += 1
+                size += pending.size
+                if size >= self.max_batch_bytes:
+                    break
+            batch = self._pending[:count]
+            del self._pending[:count]
+            return batch
+
+    def _commit(self, batch: List[_PendingWrite]) -> None:
+        try:
+            self._write_all([buffer for pending in batch for buffer in pending.buffers])
+        except Exception as e:
+            # Any error, not only OSError: an uncaught one would end this thread and leave writers waiting forever
+            self._fail(batch, e)
+            return
+        self._committed_size += sum(pending.size for pending in batch)
+        for pending in batch:
+            pending.done.set()
+
+    def _fail(self, batch: List[_PendingWrite], error: Exception) -> None:
+        """Drop a partially written batch from the file, and fail it along with the writes queued after it."""
+        try:
+            os.ftruncate(self._file.fileno(), self._committed_size)
+        except OSError as e:
+            logger.error("Error truncating the WAL after a failed write: %s", e)
+        with self._condition:
+            self.failure = error
+            failed = batch + self._pending
+            self._pending = []
+        for pending in failed:
+            pending.error = error
+            pending.done.set()
+
+    def _write_all(self, buffers: List[bytes]) -> None:
+        if not any(buffers):
+            return
+        fd = self._file.fileno()
+        # The kernel gathers the batch, no need to join it in Python first
+        _writev_all(fd, buffers)
+        if self.fsync:
+            _fdatasync(fd)
+
+
 class WAL:
-    def __init__(self, log_file_path: str, max_segment_size: int = 1024 * 1024):  # Default 1MB per segment
+    def __init__(
+        self,
+        log_file_path: str,
+        max_segment_size: int = 1024 * 1024,  # Default 1MB per segment
+        fsync: bool = True,
+        group_commit_delay: float = 0.0,
+        max_batch_bytes: int = 1024 * 1024,
+    ):
         self.log_dir = os.path.dirname(log_file_path)
         self.base_name = os.path.basename(log_file_path)
         self.max_segment_size = max_segment_size
         self.current_id = 0
-        self.existing_ids: Set[int] = set()
+        self.existing_ids = IdIntervalSet()
+        self._active_ids = IdIntervalSet()  # IDs in the active segment, summarized when it is sealed
         self.active_segment_path = ""
+        self.index_path = os.path.join(self.log_dir, f"{self.base_name}.index")
+        self._segments: List[str] = []  # segment paths sorted by number, the last one is active
+        self._sealed_segments: Dict[str, SegmentSummary] = {}  # segment path -> summary
+        self._active_file: Optional[BinaryIO] = None
+        self._active_size = 0  # bytes in the active segment, including writes still queued for commit
+        self._active_crc: Optional[int] = None  # CRC-32C of the active segment, if it holds only lines written here
+        self._active_checkpoints: Optional[LineCheckpoints] = None  # like _active_crc, only for lines written here
+        self._segment_checkpoints: Dict[str, LineCheckpoints] = {}  # sealed segment path -> checkpoints, not persisted
+        self._lock = threading.Lock()
+        self._committer = GroupCommitter(fsync=fsync, max_batch_bytes=max_batch_bytes, commit_delay=group_commit_delay)
 
         self._ensure_log_dir_exists()
         self._initialize_segments()
 
+    def __del__(self):
+        self.close()
+
+    def close(self) -> None:
+        """Commit pending writes, stop the group committer and close the active segment file."""
+        committer = getattr(self, "_committer", None)
+        if committer is not None:
+            committer.close()
+        active_file = getattr(self, "_active_file", None)
+        if active_file is not None:
+            active_file.close()
+            self._active_file = None
+
+    def _open_active_segment(self) -> None:
+        """Open the active segment for appending, keeping the handle for all subsequent writes."""
+        self._switch_active_file(self._open_segment_for_append(self.active_segment_path))
+
+    @staticmethod
+    def _open_segment_for_append(segment_path: str) -> BinaryIO:
+        # Unbuffered: the group committer already hands the kernel one write per batch
+        return open(segment_path, "ab", buffering=0)
+
+    def _switch_active_file(self, active_file: BinaryIO) -> None:
+        """Direct appends to a newly opened segment file, closing the previous one once its writes are committed."""
+        previous = self._active_file
+        self._active_file = active_file
+        self._active_size = os.fstat(self._active_file.fileno()).st_size
+        # Lines already in the file were not written by us, so they get no whole-segment CRC or checkpoints
+        self._active_crc = 0 if self._active_size == 0 else None
+        self._active_checkpoints = LineCheckpoints() if self._active_size == 0 else None
+        self._committer.switch_file(self._active_file)
+        if previous is not None:
+            previous.close()
+
     def _ensure_log_dir_exists(self):
         """Ensure that the directory for log files exists."""
         os.makedirs(self.log_dir, exist_ok=True)
 
     def _initialize_segments(self):
         """Initialize segments, find existing ones, and determine the active segment."""
-        segments = self._get_all_segments()
+        self._segments = self._list_segment_files()
+        segments = self._segments
 
         if not segments:
             # No segments yet, create the first one
             self.active_segment_path = self._create_segment_path(1)
-            with open(self.active_segment_path, "w"):
+            with open(self.active_segment_path, "wb"):
                 pass  # Create empty file
+            self._segments.append(self.active_segment_path)
         else:
             # Find the highest segment
             latest_segment = segments[-1]
             self.active_segment_path = latest_segment
 
         self._load_all_entries()
+        self._open_active_segment()
 
     def _get_all_segments(self) -> List[str]:
-        """Get all segment files sorted by segment number."""
-        segment_pattern = os.path.join(self.log_dir, f"{self.base_name}.segment.*")
-        segments = sorted(glob.glob(segment_pattern), key=self._extract_segment_number)
-        return segments
+        """Get all segment files sorted by segment number, from the in-memory list kept in sync with the disk."""
+        return self._segments
+
+    def _list_segment_files(self) -> List[str]:
+        """Scan the log directory for segment files, sorted by segment number."""
+        prefix = f"{self.base_name}.segment."
+        with os.scandir(self.log_dir) as it:
+            names = [e.name for e in it if e.name.startswith(prefix)]
+        # Parse each number once while filtering, rather than again for every sort comparison key
+        numbered = sorted((int(match.group(1)), name) for name in names if (match := _SEGMENT_NUMBER.search(name)))
+        return [os.path.join(self.log_dir, name) for _, name in numbered]
 
     def _extract_segment_number(self, segment_path: str) -> int:
         """Extract the segment number from a segment file path."""
-        try:
-            return int(segment_path.split(".")[-1])
-        except (ValueError, IndexError):
-            return 0
+        match = _SEGMENT_NUMBER.search(segment_path)
+        return int(match.group(1)) if match else 0
 
     def _create_segment_path(self, segment_number: int) -> str:
         """Create a path for a new segment file with the given number."""
         return os.path.join(self.log_dir, f"{self.base_name}.segment.{segment_number}")
 
     def _load_all_entries(self):
-        """Load all entries from all segments to populate existing IDs and determine current ID."""
-        segments = self._get_all_segments()
-        for segment in segments:
-            self._load_entries_from_file(segment)
+        """Restore sealed segment summaries from the sidecar index and scan only the active segment for IDs."""
+        persisted = self._read_segment_index()
+        sealed = self._get_all_segments()[:-1]
+        summaries = {segment: self._summary_from_index(persisted, segment) for segment in sealed}
 
-    def _load_entries_from_file(self, file_path: str):
-        """Load entries from a specific file."""
-        try:
-            with open(file_path, "r") as f:
-                self._process_log_entries(f)
-        except FileNotFoundError:
-            pass
-
-    def _process_log_entries(self, file_handle):
-        """Process each line in the log file to extract entry IDs."""
-        for line in file_handle:
-            self._process_log_entry(line)
-
-    def _process_log_entry(self, line):
-        """Process a single log entry line and update tracking data."""
-        try:
-            entry = json.loads(line)
-            entry_id = entry["id"]
+        # Rescan sealed segments that are missing from the index or changed since it was written,
+        # together with the active segment so that it is scanned alongside them rather than after
+        stale = [segment for segment, summary in summaries.items() if not self._is_current(summary, segment)]
+        scanned = self._scan_segments(stale + [self.active_segment_path])
+        active_ids = scanned.pop()
+        for segment, ids in zip(stale, scanned, strict=True):
+            summaries[segment] = SegmentSummary.from_ids(segment, ids)
 
-            if not self._is_valid_entry(entry, entry_id):
-                return
+        for segment, summary in summaries.items():
+            self._sealed_segments[segment] = summary
+            self.existing_ids.update(summary.ids)
 
-            self._update_tracking_data(entry_id)
-        except (json.JSONDecodeError, KeyError):
-            pass
+        self.current_id = self.existing_ids.max()
 
-    def _is_valid_entry(self, entry, entry_id):
-        """Check if an entry has valid CRC."""
-        if "crc" not in entry:
-            return True
+        self._load_active_ids(active_ids)
 
-        log_entry = LogEntry(**entry)
-        if not log_entry.validate_crc():
-            print(f"Warning: Entry with ID {entry_id} has invalid CRC, skipping")
-            return False
-        return True
+        if self._segment_index_data() != persisted:
+            self._write_segment_index()
 
-    def _update_tracking_data(self, entry_id):
-        """Update tracking data for a valid entry."""
-        self.existing_ids.add(entry_id)
-        if entry_id > self.current_id:
-            self.current_id = entry_id
+    @staticmethod
+    def _is_current(summary: Optional[SegmentSummary], segment: str) -> bool:
+        return summary is not None and summary.matches_file(segment)
+
+    def _summary_from_index(self, persisted: Dict[str, Any], segment: str) -> Optional[SegmentSummary]:
+        """Look up and deserialize a segment's summary from the sidecar index contents."""
+        try:
+            return SegmentSummary.from_dict(persisted["segments"][str(self._extract_segment_number(segment))])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def _read_segment_index(self) -> Dict[str, Any]:
+        """Read the sidecar index of sealed segment summaries, empty if missing or unreadable."""
+        try:
+            with open(self.index_path, "rb") as f:
+                data = orjson.loads(f.read())
+            return data if isinstance(data, dict) else {}
+        except (OSError, orjson.JSONDecodeError):
+            return {}
+
+    def _segment_index_data(self) -> Dict[str, Any]:
+        """Build the sidecar index contents from the in-memory sealed segment summaries."""
+        segments = {str(self._extract_segment_number(path)): summary.to_dict() for path, summary in self._sealed_segments.items()}
+        return {"segments": segments}
+
+    def _write_segment_index(self) -> None:
+        """Atomically persist the sealed segment summaries to the sidecar index."""
+        temp_path = f"{self.index_path}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(orjson.dumps(self._segment_index_data()))
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            logger.error("Error writing segment index %s: %s", self.index_path, e)
+
+    def _rebuild_segment_index(self) -> None:
+        """Rescan all sealed segments and persist their summaries, e.g. after they were rewritten."""
+        # Compaction only copies lines that already passed CRC validation, so skip decoding them again
+        self._sealed_segments = {
+            segment: SegmentSummary.from_ids(segment, self._read_valid_entry_ids(segment, verify=False))
+            for segment in self._get_all_segments()[:-1]
+        }
+        # The sealed segments were rewritten and renumbered, so their offsets no longer apply
+        self._segment_checkpoints = {}
+        self._write_segment_index()
+
+    def _load_active_ids(self, entry_ids: IdIntervalSet):
+        """Register the IDs of the active segment's valid entries."""
+        self.existing_ids.update(entry_ids)
+        self._active_ids.update(entry_ids)
+        if entry_ids.max() > self.current_id:
+            self.current_id = entry_ids.max()
+
+    def _read_valid_entry_ids(self, file_path: str, verify: bool = True) -> IdIntervalSet:
+        """Read the IDs of all entries with a valid CRC from a segment file.
+
+        With verify=False the IDs are pulled out of the raw lines without decoding them, for
+        segments whose entries were validated when they were written.
+        """
+        return _scan_entry_ids(file_path, _extract_valid_id if verify else _fast_extract_id)
+
+    def _scan_segments(self, segments: List[str]) -> List[IdIntervalSet]:
+        """Scan segments for valid entry IDs, in worker processes when there are enough to pay for them."""
+        if len(segments) < _PARALLEL_SCAN_MIN_SEGMENTS:
+            return [self._read_valid_entry_ids(segment) for segment in segments]
+
+        # spawn rather than fork: the group commit thread is already running
+        workers = min(len(segments), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            return list(executor.map(_scan_entry_ids, segments))
 
     def _get_next_segment_number(self) -> int:
         """Get the next segment number based on the active segment."""
         current_segment_num = self._extract_segment_number(self.active_segment_path)
         return current_segment_num + 1
 
-    def _roll_segment_if_needed(self):
-        """Roll over to a new segment file if the current one exceeds the size limit."""
+    def _roll_segment_if_needed(self, incoming_size: int = 0):
+        """Roll over to a new segment file if writing incoming_size bytes would exceed the size limit."""
+        if not self._segment_would_overflow(incoming_size):
+            return
+
+        next_segment_path = self._create_segment_path(self._get_next_segment_number())
         try:
-            if os.path.exists(self.active_segment_path) and os.path.getsize(self.active_segment_path) >= self.max_segment_size:
-                next_segment_num = self._get_next_segment_number()
-                self.active_segment_path = self._create_segment_path(next_segment_num)
-                # Create the new empty segment file
-                with open(self.active_segment_path, "w"):
-                    pass
-                print(f"Rolled over to new segment: {self.active_segment_path}")
-        except OSError:
-            # If there's an issue checking the file size, just continue with the current segment
-            pass
+            # Create the new empty segment file before touching any state
+            next_file = self._open_segment_for_append(next_segment_path)
+        except OSError as e:
+            # If the new segment can't be created, just continue with the current segment
+            logger.error("Error creating segment %s: %s", next_segment_path, e)
+            return
+
+        self._seal_active_segment()
+        self.active_segment_path = next_segment_path
+        self._segments.append(next_segment_path)
+        self._switch_active_file(next_file)
+        logger.info("Rolled over to new segment: %s", self.active_segment_path)
+        self._write_segment_index()
+
+    def _seal_active_segment(self) -> None:
+        """Summarize the active segment before it becomes read-only."""
+        self._committer.flush()
+        self._sealed_segments[self.active_segment_path] = SegmentSummary.from_ids(
+            self.active_segment_path, self._active_ids, self._active_crc
+        )
+        if self._active_checkpoints is not None:
+            self._segment_checkpoints[self.active_segment_path] = self._active_checkpoints
+        self._active_ids = IdIntervalSet()
+
+    def _segment_would_overflow(self, incoming_size: int) -> bool:
+        """Check if the active segment is non-empty and would grow past the size limit."""
+        return self._active_size > 0 and self._active_size + incoming_size > self.max_segment_size
 
     def append(self, operation: OperationType, key: str, value: Optional[Any] = None, version: Optional[int] = None) -> LogEntry:
-        self.current_id += 1
-        entry = LogEntry(id=self.current_id, operation=operation, key=key, value=value, version=version)
-        # Calculate and set CRC
-        entry.crc = entry.calculate_crc()
-        return self.append_entry(entry)
+        with self._recovering_from_failed_commit():
+            with self._lock:
+                # Encode before taking the ID, so a value orjson can't encode (e.g. an integer over 64 bits) leaves no gap
+                line, crc = _encode_entry_line(self.current_id + 1, operation.value, key, value, version)
+                self.current_id += 1
+                entry_dict = {"id": self.current_id, "operation": operation, "key": key, "value": value, "version": version, "crc": crc}
+                pending = self._write_line(self.current_id, line)
+            # Wait outside the lock so concurrent appends can share a commit
+            self._committer.wait(pending)
+        # The fields were built right here, so there is nothing for Pydantic to validate
+        entry = LogEntry.model_construct(**entry_dict)
+        entry._json_bytes = line.rstrip()
+        return entry
 
     def append_entry(self, entry: LogEntry) -> LogEntry:
         """Append a pre-created entry, used for replication"""
+        with self._recovering_from_failed_commit():
+            with self._lock:
+                pending = self._queue_entry(entry)
+            if pending is not None:
+                self._committer.wait(pending)
+        return entry
+
+    def append_entries(self, entries: List[LogEntry]) -> List[LogEntry]:
+        """Append a batch of pre-created entries with a single group commit; returns the newly added ones."""
+        new_entries: List[LogEntry] = []
+        staged: List[bytes] = []
+        pending_writes: List[_PendingWrite] = []
+        with self._recovering_from_failed_commit():
+            with self._lock:
+                for entry in entries:
+                    if self._stage_entry(entry, staged, pending_writes):
+                        new_entries.append(entry)
+                if staged:
+                    pending_writes.append(self._committer.submit_many(staged))
+            for pending in pending_writes:
+                self._committer.wait(pending)
+        return new_entries
+
+    @contextmanager
+    def _recovering_from_failed_commit(self) -> Iterator[None]:
+        """Reload the WAL's state from disk when a write fails.
+
+        IDs, sizes, CRCs and checkpoints are updated as lines are queued, before they are committed, so
+        after a failed commit they describe lines that never reached the file.
+        """
+        try:
+            yield
+        except Exception:
+            if self._committer.failure is not None:
+                with self._lock:
+                    self._reload_after_failed_commit()
+            raise
+
+    def _reload_after_failed_commit(self) -> None:
+        """Rebuild the in-memory state from the segment files; the caller must hold the lock."""
+        failure = self._committer.failure
+        if failure is None:
+            # Another writer of the failed batch got here first
+            return
+        logger.error("WAL write failed, reloading its state from disk: %s", failure)
+        self._committer.reset()
+        self.current_id = 0
+        self.existing_ids = IdIntervalSet()
+        self._active_ids = IdIntervalSet()
+        self._sealed_segments = {}
+        self._segment_checkpoints = {}
+        self._initialize_segments()
+
+    def _queue_entry(self, entry: LogEntry) -> Optional[_PendingWrite]:
+        """Queue a pre-created entry unless it already exists; the caller must hold the lock."""
+        staged: List[bytes] = []
+        if not self._stage_entry(entry, staged, []):
+            return None
+        return self._committer.submit_many(staged)
+
+    def _stage_entry(self, entry: LogEntry, staged: List[bytes], pending_writes: List[_PendingWrite]) -> bool:
+        """Stage a pre-created entry's line unless it already exists; returns whether it was staged."""
         # Skip if entry already exists
-        if entry.id in self.existing_ids:
-            return entry
+        if self.has_entry(entry.id):
+            return False
 
         # Update current_id if needed
         if entry.id > self.current_id:
             self.current_id = entry.id
 
-        # Ensure entry has valid CRC
-        if entry.crc is None:
-            entry.crc = entry.calculate_crc()
-        elif not entry.validate_crc():
-            # Recalculate CRC if invalid
+        # Ensure entry has valid CRC; replicated entries were usually validated already, hitting the cache
+        if not entry.validate_crc():
+            # Recalculate CRC if missing or invalid
             entry.crc = entry.calculate_crc()
 
-        # Check if we need to roll over to a new segment
-        self._roll_segment_if_needed()
-
-        # Append entry to the active segment
-        with open(self.active_segment_path, "a") as f:
-            f.write(json.dumps(entry.model_dump()) + "\n")
+        self._stage_line(entry.id, orjson.dumps(entry.to_raw_dict()) + b"\n", staged, pending_writes)
+        return True
 
-        self.existing_ids.add(entry.id)
-        return entry
+    def _write_line(self, entry_id: int, line: bytes) -> _PendingWrite:
+        """Queue an entry's serialized line for the active segment; the caller must hold the lock."""
+        staged: List[bytes] = []
+        self._stage_line(entry_id, line, staged, [])
+        return self._committer.submit_many(staged)
+
+    def _stage_line(self, entry_id: int, line: bytes, staged: List[bytes], pending_writes: List[_PendingWrite]) -> None:
+        """Add an entry's line to staged, the lines bound for the active segment that are not yet queued."""
+        # Check if we need to roll over to a new segment, queueing the staged lines for the old one first
+        if self._segment_would_overflow(len(line)) and staged:
+            pending_writes.append(self._committer.submit_many(list(staged)))
+            staged.clear()
+        self._roll_segment_if_needed(len(line))
+
+        staged.append(line)
+        if self._active_checkpoints is not None:
+            self._active_checkpoints.add(self._active_size, entry_id)
+        self._active_size += len(line)
+        if self._active_crc is not None:
+            self._active_crc = google_crc32c.extend(self._active_crc, line)
+        self.existing_ids.add(entry_id)
+        self._active_ids.add(entry_id)
 
     def has_entry(self, entry_id: int) -> bool:
         """Check if an entry with the given ID already exists in the WAL"""
         return entry_id in self.existing_ids
 
-    def read_from(self, start_id: int = 0) -> list[LogEntry]:
+    def read_from(self, start_id: int = 0, verify_crc: bool = True) -> list[LogEntry]:
         """Read log entries with ID >= start_id from all segments."""
-        entries = []
+        return list(self.iter_from(start_id, verify_crc))
 
-        # Get all segments
-        segments = self._get_all_segments()
+    def iter_from(self, start_id: int = 0, verify_crc: bool = True) -> Iterator[LogEntry]:
+        """Yield log entries with ID >= start_id in ID order, holding one segment's entries at a time.
 
-        # Process each segment
-        for segment in segments:
+        Segments are numbered in ID order, so only entries within a segment need sorting, and
+        sealed segments whose IDs all precede start_id are skipped without being read. With
+        verify_crc=False the CRC check is left to the consumer, e.g. a follower that validates
+        every replicated entry anyway.
+        """
+        for entry_dicts in self._iter_segment_dicts(start_id, verify_crc):
+            # One call into pydantic-core per segment beats building each model from Python, even via model_construct
+            yield from _build_log_entries(entry_dicts)
+
+    def iter_raw_from(self, start_id: int = 0, verify_crc: bool = True) -> Iterator[Dict[str, Any]]:
+        """Like iter_from, but yield the decoded entry dicts without building LogEntry models.
+
+        For callers that only pass entries on, such as the leader serving them to followers.
+        Without verify_crc the dicts are only known to carry an integer id.
+        """
+        for entry_dicts in self._iter_segment_dicts(start_id, verify_crc):
+            yield from entry_dicts
+
+    def iter_raw_lines_from(self, start_id: int = 0) -> Iterator[bytes]:
+        """Like iter_raw_from without CRC checks, but yield each entry's stored JSON line as is.
+
+        Every line is still decoded to check it is a JSON object with an integer id, so the lines can be
+        joined into a JSON array without re-serializing the entries.
+        """
+        for segment in self._segments_from(start_id):
             try:
-                self._append_entries(entries, segment, start_id)
+                id_lines = self._read_segment_lines(segment, start_id)
             except FileNotFoundError:
                 continue
-
-        # Sort entries by ID to ensure correct order
-        entries.sort(key=lambda e: e.id)
-        return entries
-
-    def _append_entries(self, entries, segment, start_id):
-        with open(segment, "r") as f:
-            for line in f:
-                try:
-                    self._append_single_entry(entries, line, start_id)
-                except (json.JSONDecodeError, ValueError) as e:
-                    print(f"Error parsing log entry: {str(e)}")
-                    continue
-
-    def _append_single_entry(self, entries, line, start_id):
-        entry = self._parse_log_entry(line)
-        if entry and self._should_include_entry(entry, start_id):
-            entries.append(entry)
-
-    def _parse_log_entry(self, line: str) -> Optional[LogEntry]:
-        """Parse a log entry from a line in the log file."""
+            id_lines.sort(key=itemgetter(0))
+            for _, line in id_lines:
+                yield line
+
+    def _segments_from(self, start_id: int) -> Iterator[str]:
+        """Yield, in order, the segments that may hold entries with ID >= start_id."""
+        for segment in list(self._get_all_segments()):
+            if not self._segment_ends_before(segment, start_id):
+                yield segment
+
+    def _iter_segment_dicts(self, start_id: int, verify_crc: bool) -> Iterator[List[Dict[str, Any]]]:
+        for segment in self._segments_from(start_id):
+            try:
+                entry_dicts = self._read_segment_dicts(segment, start_id, verify_crc)
+            except FileNotFoundError:
+                continue
+            # Already sorted unless the segment was written out of order; cheap for Timsort either way
+            entry_dicts.sort(key=itemgetter("id"))
+            yield entry_dicts
+
+    def _segment_ends_before(self, segment: str, start_id: int) -> bool:
+        summary = self._sealed_segments.get(segment)
+        return summary is not None and summary.ids.max() < start_id
+
+    def _read_segment_dicts(self, segment: str, start_id: int, verify_crc: bool = True) -> List[Dict[str, Any]]:
+        # One CRC over an intact sealed segment vouches for every entry in it
+        verify_crc = verify_crc and not self._segment_intact(segment)
+        entry_dicts = []
+        for _, line in _iter_file_lines(segment, self._start_offset(segment, start_id)):
+            entry_dict = self._decode_log_entry(line, verify_crc)
+            if entry_dict is not None and self._id_at_least(entry_dict, start_id):
+                entry_dicts.append(entry_dict)
+        return entry_dicts
+
+    def _read_segment_lines(self, segment: str, start_id: int) -> List[Tuple[int, bytes]]:
+        id_lines = []
+        for _, line in _iter_file_lines(segment, self._start_offset(segment, start_id)):
+            entry_dict = self._decode_log_entry(line, verify_crc=False)
+            if entry_dict is not None and self._id_at_least(entry_dict, start_id):
+                id_lines.append((entry_dict["id"], line.rstrip()))
+        return id_lines
+
+    def _start_offset(self, segment: str, start_id: int) -> int:
+        """Find where reading a segment for IDs >= start_id can begin."""
+        if segment == self.active_segment_path:
+            checkpoints = self._active_checkpoints
+        else:
+            checkpoints = self._segment_checkpoints.get(segment)
+        return checkpoints.start_offset(start_id) if checkpoints is not None else 0
+
+    def _segment_intact(self, segment: str) -> bool:
+        """Check a sealed segment against the whole-file CRC recorded when it was sealed."""
+        summary = self._sealed_segments.get(segment)
+        return summary is not None and summary.crc is not None and _file_crc(segment) == summary.crc
+
+    @staticmethod
+    def _id_at_least(entry_dict: Dict[str, Any], start_id: int) -> bool:
+        # Unverified entries may carry an id of any type
+        entry_id = entry_dict.get("id")
+        return isinstance(entry_id, int) and entry_id >= start_id
+
+    def _decode_log_entry(self, line: bytes, verify_crc: bool = True) -> Optional[Dict[str, Any]]:
+        """Decode a log entry line into a dict, or None if it is malformed or fails CRC validation."""
         try:
-            entry_dict = json.loads(line)
-            entry = LogEntry(**entry_dict)
-
-            # Skip entries with invalid CRC
-            if not entry.validate_crc():
-                print(f"Warning: Skipping entry with ID {entry.id} due to CRC validation failure")
-                return None
-
-            return entry
-        except (json.JSONDecodeError, ValueError) as e:
-            print(f"Error parsing log entry: {str(e)}")
+            entry_dict = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            logger.warning("Error parsing log entry: %s", e)
             return None
 
-    def _should_include_entry(self, entry: LogEntry, start_id: int) -> bool:
-        """Check if an entry should be included based on its ID."""
-        return entry.id >= start_id
+        if not isinstance(entry_dict, dict):
+            logger.warning("Error parsing log entry: not a JSON object")
+            return None
+        # Skip entries with invalid CRC
+        if verify_crc and not _validate_crc(entry_dict):
+            logger.warning("Skipping entry with ID %s due to CRC validation failure", entry_dict.get("id"))
+            return None
+        return entry_dict
 
     def get_last_id(self) -> int:
         return self.current_id
 
+    def get_segment_sizes(self) -> List[Tuple[str, int]]:
+        """Return (path, size) for every segment from the sizes tracked in memory, without a stat per segment."""
+        sizes = []
+        for segment in list(self._get_all_segments()):
+            summary = self._sealed_segments.get(segment)
+            if segment == self.active_segment_path:
+                sizes.append((segment, self._active_size))
+            elif summary is not None:
+                sizes.append((segment, summary.size))
+        return sizes
+
     def get_segment_files(self) -> List[str]:
         """Get a list of all segment files."""
-        return self._get_all_segments()
+        return list(self._get_all_segments())
 
     def get_active_segment(self) -> str:
         """Get the path of the currently active segment."""
@@ -332,23 +1166,25 @@ class WAL:
             - Number of segments compacted
             - Number of entries removed
         """
+        with self._lock:
+            return self._compact_segments()
+
+    def _compact_segments(self) -> Tuple[int, int]:
         segments = self._get_segments_for_compaction()
         if not segments:
             return 0, 0
 
-        # Read all entries from segments marked for compaction
-        entries = self._read_entries_from_segments(segments)
-        if not entries:
+        # Pass 1: locate the latest operation for each key, without keeping the entries
+        latest_locations: Dict[str, Tuple[int, Tuple[str, int, int]]] = {}
+        total_entries = sum(self._index_latest_entries(segment, latest_locations) for segment in segments)
+        if not total_entries:
             return 0, 0
 
-        # Filter to get only the latest operation for each key
-        entries_to_keep = self._filter_latest_entries(entries)
-
         # Calculate entries removed
-        entries_removed = len(entries) - len(entries_to_keep)
+        entries_removed = total_entries - len(latest_locations)
 
-        # Write the compacted entries and handle cleanup
-        self._write_compacted_entries(segments, entries_to_keep)
+        # Pass 2: copy the surviving lines in ID order and handle cleanup
+        self._write_compacted_entries(segments, [location for _, location in sorted(latest_locations.values())])
 
         return len(segments), entries_removed
 
@@ -363,37 +1199,39 @@ class WAL:
         # The last segment is the active one, we won't compact it
         return segments[:-1]
 
-    def _read_entries_from_segments(self, segments: List[str]) -> List[LogEntry]:
-        """Read all entries from the given segments"""
-        entries = []
-        for segment in segments:
-            segment_entries = self._read_entries_from_segment(segment)
-            entries.extend(segment_entries)
-        return entries
-
-    def _filter_latest_entries(self, entries: List[LogEntry]) -> List[LogEntry]:
-        """Filter entries to keep only the latest operation for each key"""
-        key_to_latest_entry: Dict[str, LogEntry] = {}
-
-        # Track latest operation for each key
-        for entry in sorted(entries, key=lambda e: e.id):
-            if entry.operation in [OperationType.SET, OperationType.DELETE]:
-                key_to_latest_entry[entry.key] = entry
-
-        # Extract the values and sort by ID
-        result = list(key_to_latest_entry.values())
-        result.sort(key=lambda e: e.id)
-        return result
-
-    def _write_compacted_entries(self, segments_to_remove: List[str], entries: List[LogEntry]) -> None:
-        """Write compacted entries to a new segment and clean up old segments"""
+    def _index_latest_entries(self, segment_path: str, latest_locations: Dict[str, Tuple[int, Tuple[str, int, int]]]) -> int:
+        """Record the ID and (segment, offset, length) of each key's latest operation in a segment.
+
+        Returns the number of valid entries seen.
+        """
+        count = 0
+        for offset, line in self._iter_segment_lines(segment_path):
+            entry = self._parse_raw_entry(line)
+            if entry is not None:
+                count += 1
+                self._track_latest(latest_locations, entry, (segment_path, offset, len(line)))
+        return count
+
+    @staticmethod
+    def _track_latest(
+        latest_locations: Dict[str, Tuple[int, Tuple[str, int, int]]], entry: Dict[str, Any], location: Tuple[str, int, int]
+    ) -> None:
+        if entry["operation"] not in (OperationType.SET, OperationType.DELETE):
+            return
+        # Compare IDs rather than file order: a follower's segments can hold replicated entries out of order.
+        # A winning DELETE is kept even with no SET before it here, as an older SET may still be replicated later.
+        latest = latest_locations.get(entry["key"])
+        if latest is None or entry["id"] > latest[0]:
+            latest_locations[entry["key"]] = (entry["id"], location)
+
+    def _write_compacted_entries(self, segments_to_remove: List[str], locations: List[Tuple[str, int, int]]) -> None:
+        """Copy the raw lines at the given locations to a new segment and clean up old segments"""
         # Create a new compacted segment
         compacted_segment_path = self._create_compacted_segment()
 
-        # Write entries to the compacted segment
-        with open(compacted_segment_path, "w") as f:
-            for entry in entries:
-                f.write(json.dumps(entry.model_dump()) + "\n")
+        # Copy entries to the compacted segment, many lines per writev call
+        with open(compacted_segment_path, "wb", buffering=0) as f:
+            _write_lines(f.fileno(), self._iter_located_lines(locations))
 
         # Delete old segments after successful compaction
         self._delete_segments(segments_to_remove)
@@ -401,55 +1239,65 @@ class WAL:
         # Update segment numbers to be continuous
         self._renumber_segments()
 
+        # The sealed segments were rewritten, so their summaries are stale
+        self._rebuild_segment_index()
+
+        # Renumbering may have moved the active segment
+        self._open_active_segment()
+
     def _delete_segments(self, segments: List[str]) -> None:
         """Delete the given segment files"""
         for segment in segments:
             try:
                 os.remove(segment)
+                self._segments.remove(segment)
             except OSError as e:
-                print(f"Error removing segment {segment}: {e}")
+                logger.error("Error removing segment %s: %s", segment, e)
 
-    def _read_entries_from_segment(self, segment_path: str) -> List[LogEntry]:
-        """Read all entries from a segment file."""
-        if not self._is_valid_segment_file(segment_path):
-            return []
-
-        entries = []
-        for line in self._read_segment_lines(segment_path):
-            entry = self._parse_entry_from_line(line)
-            if entry:
-                entries.append(entry)
-
-        return entries
-
-    def _is_valid_segment_file(self, segment_path: str) -> bool:
-        """Check if the segment file exists and is readable."""
-        return os.path.exists(segment_path)
-
-    def _read_segment_lines(self, segment_path: str) -> List[str]:
-        """Read all lines from a segment file, handling errors."""
-        lines = []
+    def _iter_located_lines(self, locations: List[Tuple[str, int, int]]) -> Iterator[bytes]:
+        """Yield raw lines from their segments, mapping one segment at a time as the locations advance."""
+        current_segment, current_map = None, None
+        try:
+            for segment_path, offset, length in locations:
+                if segment_path != current_segment:
+                    self._close_map(current_map)
+                    current_segment, current_map = segment_path, self._map_segment(segment_path)
+                line = current_map[offset : offset + length]
+                yield line if line.endswith(b"\n") else line + b"\n"
+        finally:
+            self._close_map(current_map)
+
+    @staticmethod
+    def _map_segment(segment_path: str) -> mmap.mmap:
+        with open(segment_path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def _close_map(segment_map: Optional[mmap.mmap]) -> None:
+        if segment_map is not None:
+            segment_map.close()
+
+    def _iter_segment_lines(self, segment_path: str) -> Iterator[Tuple[int, bytes]]:
+        """Yield each line of a segment file with its byte offset, handling errors."""
         try:
-            with open(segment_path, "r") as f:
-                lines = f.readlines()
+            yield from _iter_file_lines(segment_path)
         except OSError:
-            print(f"Error accessing segment file {segment_path}")
-        return lines
+            logger.error("Error accessing segment file %s", segment_path)
 
-    def _parse_entry_from_line(self, line: str) -> Optional[LogEntry]:
-        """Parse a single entry from a line in the log file."""
+    def _parse_raw_entry(self, line: bytes) -> Optional[Dict[str, Any]]:
+        """Decode a single line of the log file into an entry dict, without building a LogEntry."""
         try:
-            entry_dict = json.loads(line)
-            entry = LogEntry(**entry_dict)
-
-            if entry.crc and not entry.validate_crc():
-                return None
-
-            return entry
-        except (json.JSONDecodeError, ValueError):
+            entry_dict = orjson.loads(line)
+        except orjson.JSONDecodeError:
             # Skip invalid entries
             return None
 
+        if not isinstance(entry_dict, dict) or not entry_dict.keys() >= _REQUIRED_FIELDS:
+            return None
+        if entry_dict.get("crc") and not _validate_crc(entry_dict):
+            return None
+        return entry_dict
+
     def _create_compacted_segment(self) -> str:
         """Create a new segment file for compacted entries."""
         return os.path.join(self.log_dir, f"{self.base_name}.compacted.temp")
@@ -475,7 +1323,8 @@ class WAL:
         # Rename the remaining segments to have contiguous numbers
         self._rename_remaining_segments(segments)
 
-        # Update the active segment path
+        # Files were renamed on disk, so list them again and update the active segment path
+        self._segments = self._list_segment_files()
         self._update_active_segment_path()
 
     def _set_active_segment(self, segments):
@@ -492,7 +1341,7 @@ class WAL:
                 if os.path.exists(segment):
                     os.rename(segment, temp_path)
             except OSError as e:
-                print(f"Error renaming segment {segment}: {e}")
+                logger.error("Error renaming segment %s: %s", segment, e)
 
     def _rename_compacted_to_first_segment(self, compacted_path):
         """Rename the compacted file to be the first segment."""
@@ -500,7 +1349,7 @@ class WAL:
             new_first_segment = self._create_segment_path(1)
             os.rename(compacted_path, new_first_segment)
         except OSError as e:
-            print(f"Error renaming compacted file: {e}")
+            logger.error("Error renaming compacted file: %s", e)
 
     def _rename_remaining_segments(self, segments):
         """Rename remaining segments to have contiguous numbers."""
@@ -512,7 +1361,7 @@ class WAL:
                     new_path = self._create_segment_path(i)
                     os.rename(temp_path, new_path)
             except OSError as e:
-                print(f"Error renaming segment {temp_path}: {e}")
+                logger.error("Error renaming segment %s: %s", temp_path, e)
 
     def _update_active_segment_path(self):
         """Update the active segment path to be the highest segment."""
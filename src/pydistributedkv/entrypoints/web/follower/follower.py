@@ -1,27 +1,50 @@
+import asyncio
 import logging
 import os
 import time
+from operator import attrgetter
 from typing import Any, Dict, Optional, Tuple
 
-import requests
-from fastapi import FastAPI, HTTPException, Query
-
-from pydistributedkv.configurator.settings.base import API_TIMEOUT, compaction_interval, HEARTBEAT_INTERVAL, MAX_SEGMENT_SIZE
-from pydistributedkv.domain.models import ClientRequest, LogEntry, OperationType, ReplicationRequest, WAL
+import httpx
+import orjson
+from fastapi import FastAPI, HTTPException, Query, Request
+from pydantic import ValidationError
+
+from pydistributedkv.configurator.settings.base import (
+    API_TIMEOUT,
+    compaction_interval,
+    HEARTBEAT_INTERVAL,
+    LOG_LEVEL,
+    MAX_SEGMENT_SIZE,
+    SYNC_PAGE_SIZE,
+    SYNC_PREFETCH_PAGES,
+    VERSION_HISTORY_DEPTH,
+    WAL_FSYNC,
+    WAL_GROUP_COMMIT_DELAY_US,
+    WAL_MAX_BATCH_BYTES,
+)
+from pydistributedkv.domain.models import LOG_ENTRY_LIST_ADAPTER, LogEntry, LogEntryBatch, OperationType, WAL
 from pydistributedkv.service.compaction import LogCompactionService
 from pydistributedkv.service.heartbeat import HeartbeatService
 from pydistributedkv.service.request_deduplication import RequestDeduplicationService
 from pydistributedkv.service.storage import KeyValueStorage
+from pydistributedkv.utils.common import configure_logging, JSON_HEADERS, orjson_response
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+configure_logging(LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
 # Initialize WAL and storage
-wal = WAL(os.getenv("WAL_PATH", "data/follower/wal.log"), max_segment_size=MAX_SEGMENT_SIZE)
-storage = KeyValueStorage(wal)
+wal = WAL(
+    os.getenv("WAL_PATH", "data/follower/wal.log"),
+    max_segment_size=MAX_SEGMENT_SIZE,
+    fsync=WAL_FSYNC,
+    group_commit_delay=WAL_GROUP_COMMIT_DELAY_US / 1_000_000,
+    max_batch_bytes=WAL_MAX_BATCH_BYTES,
+)
+storage = KeyValueStorage(wal, max_history=VERSION_HISTORY_DEPTH)
 
 # Initialize compaction service
 compaction_service = LogCompactionService(storage, compaction_interval=compaction_interval)
@@ -29,6 +52,9 @@ compaction_service = LogCompactionService(storage, compaction_interval=compactio
 # Request deduplication service
 request_deduplication = RequestDeduplicationService(service_name="follower")
 
+# Pooled client for talking to the leader, so calls neither block the event loop nor reconnect each time
+http_client = httpx.AsyncClient(timeout=API_TIMEOUT, limits=httpx.Limits(max_keepalive_connections=20, max_connections=50))
+
 # Leader connection info
 leader_url = os.getenv("LEADER_URL", "http://localhost:8000")
 follower_id = os.getenv("FOLLOWER_ID", "follower-1")
@@ -37,8 +63,10 @@ follower_url = os.getenv("FOLLOWER_URL", "http://localhost:8001")
 # Create heartbeat service
 heartbeat_service = HeartbeatService(service_name="follower", server_id=follower_id, server_url=follower_url)
 
-# Replication state
-last_applied_id = wal.get_last_id()  # Initialize with the current last ID in WAL
+# Held while entries are appended and applied, so they reach storage in ID order
+apply_lock = asyncio.Lock()
+# Background sync started when a replication batch leaves a gap
+catch_up_task: Optional[asyncio.Task] = None
 
 
 @app.on_event("startup")
@@ -55,20 +83,20 @@ async def startup_event():
 
     # Register with leader
     try:
-        response = requests.post(
+        response = await http_client.post(
             f"{leader_url}/register_follower",
-            json={"id": follower_id, "url": follower_url, "last_applied_id": last_applied_id},
-            timeout=API_TIMEOUT,
+            content=orjson.dumps({"id": follower_id, "url": follower_url, "last_applied_id": wal.get_last_id()}),
+            headers=JSON_HEADERS,
         )
-        response_data = response.json()
+        response_data = orjson.loads(response.content)
 
         # If leader has entries we don't, fetch them
         leader_last_id = response_data.get("last_log_id", 0)
-        if leader_last_id > last_applied_id:
+        if leader_last_id > wal.get_last_id():
             await sync_with_leader()
-    except requests.RequestException as e:
+    except (httpx.HTTPError, orjson.JSONDecodeError) as e:
         # In production, you'd implement retry logic
-        logger.error(f"Failed to register with leader at {leader_url}: {str(e)}")
+        logger.error("Failed to register with leader at %s: %s", leader_url, e)
 
 
 @app.on_event("shutdown")
@@ -79,65 +107,143 @@ async def shutdown_event():
     # Stop compaction service
     await compaction_service.stop()
 
+    # Stop a catch-up sync still running
+    if catch_up_task is not None:
+        catch_up_task.cancel()
+
+    # Flush and close the WAL
+    wal.close()
+
+    # Close the pooled leader connections
+    await http_client.aclose()
+
     logger.info("Follower server shutting down")
 
 
 async def sync_with_leader():
-    """Synchronize the follower with the leader by fetching and applying new log entries."""
-    global last_applied_id  # This global declaration is necessary here
+    """Synchronize the follower with the leader by fetching and applying new log entries.
+
+    Pages are fetched while earlier ones are appended to the WAL, with a bounded queue between the two.
+    """
+    pages: asyncio.Queue = asyncio.Queue(maxsize=SYNC_PREFETCH_PAGES)
+    fetcher = asyncio.create_task(_fetch_pages(pages))
     try:
-        entries = await fetch_entries_from_leader()
-        if not entries:
-            return
+        await _apply_pages(pages)
+        # Surface a fetch error that ended the pages early
+        await fetcher
+    except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+        logger.warning("Failed to sync with leader at %s: %s", leader_url, e)
+    finally:
+        fetcher.cancel()
+
+
+async def _fetch_pages(pages: asyncio.Queue) -> None:
+    """Queue pages of new entries from the leader until it has none left, then a None end marker."""
+    since = wal.get_last_id()
+    try:
+        while True:
+            entries, last_served_id = await fetch_entries_from_leader(since, SYNC_PAGE_SIZE)
+            if last_served_id == since:
+                break
+            since = last_served_id
+            await pages.put(entries)
+    except Exception:
+        # Wake the consumer so sync_with_leader can collect the error
+        await pages.put(None)
+        raise
+    await pages.put(None)
+
+
+async def _apply_pages(pages: asyncio.Queue) -> None:
+    while (entries := await pages.get()) is not None:
+        async with apply_lock:
+            # Append off the event loop so the next page downloads meanwhile; the WAL is thread-safe
+            new_entries = await asyncio.to_thread(append_entries_to_wal, entries)
+            if new_entries:
+                apply_entries_to_storage(new_entries)
+
+
+async def fetch_entries_from_leader(since: int, limit: Optional[int] = None) -> Tuple[list[LogEntry], int]:
+    """Fetch log entries after `since` from the leader.
+
+    Returns the new, valid entries and the last ID the leader served, which is `since` if it served none.
+    """
+    params = {"limit": limit} if limit is not None else None
+    response = await http_client.get(f"{leader_url}/log_entries/{since}", params=params)
+    try:
+        # Build the models straight from the response bytes, without intermediate dicts
+        entries = LogEntryBatch.model_validate_json(response.content).entries
+    except ValidationError:
+        # Decode to dicts so only the malformed entries are dropped
+        entry_data_list = orjson.loads(response.content).get("entries", [])
+        return _parse_and_validate_entries(entry_data_list, source="leader"), _last_served_id(entry_data_list, since)
 
-        new_entries = append_entries_to_wal(entries)
-        if new_entries:
-            last_applied_id = apply_entries_to_storage(new_entries)
-    except requests.RequestException:
-        print("Failed to sync with leader")
+    return _new_valid_entries(entries, source="leader"), entries[-1].id if entries else since
 
 
-async def fetch_entries_from_leader() -> list[LogEntry]:
-    """Fetch new log entries from the leader."""
-    response = requests.get(f"{leader_url}/log_entries/{last_applied_id}", timeout=API_TIMEOUT)
-    data = response.json()
-    return _parse_and_validate_entries(data.get("entries", []), source="leader")
+def _last_served_id(entry_data_list: list, since: int) -> int:
+    entry_ids = [entry_data.get("id") for entry_data in entry_data_list if isinstance(entry_data, dict)]
+    return max((entry_id for entry_id in entry_ids if isinstance(entry_id, int)), default=since)
 
 
 def _parse_and_validate_entries(entry_data_list: list[dict], source: str = "") -> list[LogEntry]:
     """Parse and validate log entries from the provided data."""
-    valid_entries = []
+    # Entries the WAL already holds, e.g. resent after a timeout, need no parsing or CRC check
+    entry_data_list = [entry_data for entry_data in entry_data_list if not _is_stored(entry_data)]
+    try:
+        # Validate the whole batch at once, the common case
+        entries = LOG_ENTRY_LIST_ADAPTER.validate_python(entry_data_list)
+    except ValidationError:
+        # Parse one at a time so only the malformed entries are dropped
+        entries = _parse_entries_one_by_one(entry_data_list, source)
+
+    return _drop_invalid_crc(entries, source)
+
 
+def _parse_entries_one_by_one(entry_data_list: list[dict], source: str = "") -> list[LogEntry]:
+    """Parse each entry on its own, skipping the malformed ones with a single warning for the batch."""
+    entries = []
     for entry_data in entry_data_list:
-        entry = _create_valid_entry(entry_data, source)
-        if entry:
-            valid_entries.append(entry)
+        try:
+            entries.append(LogEntry(**entry_data))
+        except ValueError as e:
+            logger.debug("Error parsing entry from %s: %s", source, e)
 
-    return valid_entries
+    if len(entries) < len(entry_data_list):
+        logger.warning("Dropped %s malformed entries from %s", len(entry_data_list) - len(entries), source)
+    return entries
 
 
-def _create_valid_entry(entry_data: dict, source: str = "") -> LogEntry | None:
-    """Create and validate a single log entry."""
-    try:
-        entry = LogEntry(**entry_data)
-        if not entry.validate_crc():
-            print(f"Warning: Received entry with ID {entry.id} with invalid CRC from {source}")
-            return None
-        return entry
-    except ValueError as e:
-        print(f"Error parsing entry from {source}: {str(e)}")
-        return None
+def _is_stored(entry_data: Any) -> bool:
+    entry_id = entry_data.get("id") if isinstance(entry_data, dict) else None
+    return isinstance(entry_id, int) and wal.has_entry(entry_id)
 
 
-def append_entries_to_wal(entries: list[LogEntry]) -> list[LogEntry]:
-    """Append new entries to the WAL and return only the newly added ones."""
-    new_entries = []
+def _new_valid_entries(entries: list[LogEntry], source: str = "") -> list[LogEntry]:
+    """Keep the entries the WAL doesn't hold yet whose CRC matches."""
+    return _drop_invalid_crc([entry for entry in entries if not wal.has_entry(entry.id)], source)
+
+
+def _drop_invalid_crc(entries: list[LogEntry], source: str = "") -> list[LogEntry]:
+    """Keep the entries whose CRC matches; a corrupted batch logs one warning, not one per entry."""
+    valid_entries: list[LogEntry] = []
+    invalid_ids: list[int] = []
     for entry in entries:
-        # Ensure we only add entries with valid CRC
-        if entry.validate_crc() and not wal.has_entry(entry.id):
-            wal.append_entry(entry)
-            new_entries.append(entry)
-    return new_entries
+        if entry.validate_crc():
+            valid_entries.append(entry)
+        else:
+            invalid_ids.append(entry.id)
+    if invalid_ids:
+        logger.warning("Dropped %s entries with invalid CRC from %s, first ID %s", len(invalid_ids), source, invalid_ids[0])
+    return valid_entries
+
+
+def append_entries_to_wal(entries: list[LogEntry]) -> list[LogEntry]:
+    """Append new entries to the WAL and return only the newly added ones.
+
+    The entries must come from _parse_and_validate_entries, which already dropped those with an invalid CRC.
+    """
+    return wal.append_entries(entries)
 
 
 def apply_entries_to_storage(entries: list[LogEntry]) -> int:
@@ -146,38 +252,84 @@ def apply_entries_to_storage(entries: list[LogEntry]) -> int:
 
 
 @app.post("/replicate")
-async def replicate(req: ReplicationRequest):
-    global last_applied_id  # This global declaration is necessary here
+async def replicate(request: Request):
+    # Validate the body straight into LogEntry models, parsing each entry only once
+    entries = _parse_replication_entries(await request.body())
+    entries.sort(key=attrgetter("id"))
+
+    async with apply_lock:
+        # Applying a batch that arrived early, or after a lost one, could let an older write overwrite a newer
+        # one; reject it so the leader retries, and fetch the missing entries from the leader's log meanwhile
+        if not _continues_log(entries):
+            _start_catch_up()
+            raise HTTPException(status_code=409, detail=f"Entries must continue from ID {wal.get_last_id()}")
+
+        # Append in a worker thread, so the event loop keeps serving while the WAL syncs
+        new_entries = await asyncio.to_thread(_process_new_entries, entries)
+
+        if new_entries:
+            storage.apply_entries(new_entries)
+
+    # The WAL's highest ID is the last applied one, so there is no separate counter to keep in step
+    return orjson_response({"status": "ok", "last_applied_id": wal.get_last_id()})
+
+
+def _continues_log(entries: list[LogEntry]) -> bool:
+    """Whether entries sorted by ID are consecutive and leave no gap after the last one in the WAL."""
+    if not entries:
+        return True
+    ids = [entry.id for entry in entries]
+    return ids[0] <= wal.get_last_id() + 1 and all(current - previous <= 1 for previous, current in zip(ids, ids[1:], strict=False))
+
+
+def _start_catch_up() -> None:
+    """Sync with the leader in the background, unless a sync is already running."""
+    global catch_up_task  # This global declaration is necessary here
+    if catch_up_task is None or catch_up_task.done():
+        catch_up_task = asyncio.create_task(sync_with_leader())
+        catch_up_task.add_done_callback(_log_catch_up_failure)
 
-    # Use the existing helper to parse and validate entries
-    entries = _parse_and_validate_entries(req.entries, source="replication request")
 
-    # Process and apply new entries
-    new_entries = _process_new_entries(entries)
+def _log_catch_up_failure(task: asyncio.Task) -> None:
+    """Log a catch-up sync that ended with an error sync_with_leader does not handle, e.g. an invalid page."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Catch-up sync with leader at %s failed", leader_url, exc_info=task.exception())
 
-    # Update the last applied ID if we have new entries
-    if new_entries:
-        last_id = storage.apply_entries(new_entries)
-        last_applied_id = max(last_applied_id, last_id)
 
-    return {"status": "ok", "last_applied_id": last_applied_id}
+def _parse_replication_entries(body: bytes) -> list[LogEntry]:
+    """Return the new entries with a valid CRC from a replication request body."""
+    try:
+        entries = LogEntryBatch.model_validate_json(body).entries
+    except ValidationError:
+        # Decode to dicts, to reject a malformed body or drop only the malformed entries
+        return _parse_and_validate_entries(_parse_replication_body(body), source="replication request")
+
+    return _new_valid_entries(entries, source="replication request")
+
+
+def _parse_replication_body(body: bytes) -> list[dict]:
+    """Extract the entry dicts from a replication request body, shaped like ReplicationRequest."""
+    try:
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}") from e
+
+    entries = data.get("entries") if isinstance(data, dict) else None
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        raise HTTPException(status_code=422, detail="Replication request must have an 'entries' list of objects")
+    return entries
 
 
 def _process_new_entries(entries: list[LogEntry]) -> list[LogEntry]:
-    """Process and store only entries that don't exist in the WAL."""
+    """Process and store only entries that don't exist in the WAL; their CRCs must be validated already."""
     if not entries:
         return []
 
-    new_entries = []
-    for entry in entries:
-        if not wal.has_entry(entry.id):
-            wal.append_entry(entry)
-            new_entries.append(entry)
-    return new_entries
+    return wal.append_entries(entries)
 
 
 @app.get("/key/{key}")
-def get_key(
+async def get_key(
     key: str,
     version: Optional[int] = Query(None, description="Specific version to retrieve"),
     client_id: Optional[str] = Query(None),
@@ -187,16 +339,14 @@ def get_key(
     # Check for cached response from duplicate request
     cached_response = _check_request_cache(client_id, request_id, key, OperationType.GET)
     if cached_response:
-        return cached_response
+        return orjson_response(cached_response)
 
     # Get the value and prepare response
-    result = _get_value_from_storage(key, version)
+    result = storage.get_with_version(key, version)
     if result is None:
-        response = {"status": "error", "message": f"Key not found: {key}"}
-        if version:
-            response["message"] = f"Key not found or version {version} not available: {key}"
-        _cache_response_if_needed(client_id, request_id, key, OperationType.GET, response)
-        raise HTTPException(status_code=404, detail=response["message"])
+        message = f"Key not found or version {version} not available: {key}" if version else f"Key not found: {key}"
+        _cache_response_if_needed(client_id, request_id, key, OperationType.GET, {"status": "error", "message": message})
+        raise HTTPException(status_code=404, detail=message)
 
     value, actual_version = result
 
@@ -206,30 +356,25 @@ def get_key(
     # Cache the response if client tracking is enabled
     _cache_response_if_needed(client_id, request_id, key, OperationType.GET, response)
 
-    return response
+    return orjson_response(response)
 
 
 def _check_request_cache(client_id: Optional[str], request_id: Optional[str], key: str, operation: OperationType) -> Optional[Dict]:
     """Check if this is a duplicate request with a cached response"""
     if not client_id or not request_id:
-        logger.info(f"GET request for key={key} (no client ID)")
+        logger.info("GET request for key=%s (no client ID)", key)
         return None
 
-    logger.info(f"GET request for key={key} from client={client_id}, request={request_id}")
+    logger.info("GET request for key=%s from client=%s, request=%s", key, client_id, request_id)
     previous_response = request_deduplication.get_processed_result(client_id, request_id, operation)
 
     if previous_response is not None:
-        logger.info(f"✅ Returning cached response for GET key={key}, client={client_id}, request={request_id}")
+        logger.info("Returning cached response for GET key=%s, client=%s, request=%s", key, client_id, request_id)
         return previous_response
 
     return None
 
 
-def _get_value_from_storage(key: str, version: Optional[int] = None) -> Optional[Tuple[Any, int]]:
-    """Get a value and its version from storage"""
-    return storage.get_with_version(key, version)
-
-
 def _cache_response_if_needed(
     client_id: Optional[str], request_id: Optional[str], key: str, operation: OperationType, response: Dict
 ) -> None:
@@ -237,66 +382,58 @@ def _cache_response_if_needed(
     if not client_id or not request_id:
         return
 
-    client_request = ClientRequest(client_id=client_id, request_id=request_id, operation=operation, key=key)
-    request_deduplication.mark_request_processed(client_request, response)
+    request_deduplication.mark_processed(client_id, request_id, operation, response, key=key)
 
     status = "error" if "status" in response and response["status"] == "error" else "success"
-    logger.info(f"Cached {status} response for GET key={key}, client={client_id}, request={request_id}")
+    logger.info("Cached %s response for GET key=%s, client=%s, request=%s", status, key, client_id, request_id)
 
 
 @app.get("/status")
-def get_status():
-    return {"follower_id": follower_id, "last_applied_id": last_applied_id, "leader_url": leader_url}
+async def get_status():
+    return {"follower_id": follower_id, "last_applied_id": wal.get_last_id(), "leader_url": leader_url}
 
 
 @app.get("/segments")
-def get_segments():
+async def get_segments():
     """Return information about the WAL segments"""
-    segments = wal.get_segment_files()
     active_segment = wal.get_active_segment()
-
-    segment_info = []
-    for segment in segments:
-        try:
-            size = os.path.getsize(segment)
-            segment_info.append({"path": segment, "size": size, "is_active": segment == active_segment})
-        except FileNotFoundError:
-            pass
+    # Sizes come from the WAL's own bookkeeping rather than a stat per segment
+    segment_info = [{"path": segment, "size": size, "is_active": segment == active_segment} for segment, size in wal.get_segment_sizes()]
 
     return {"segments": segment_info, "total_segments": len(segment_info), "max_segment_size": MAX_SEGMENT_SIZE}
 
 
 @app.get("/keys")
-def get_all_keys():
+async def get_all_keys():
     """Return all keys in the storage"""
     keys = storage.get_all_keys()
-    return {"keys": keys, "count": len(keys)}
+    return orjson_response({"keys": keys, "count": len(keys)})
 
 
 @app.get("/request_status")
-def get_request_status(client_id: str, request_id: str, operation: Optional[str] = Query(None)):
+async def get_request_status(client_id: str, request_id: str, operation: Optional[str] = Query(None)):
     """Check if a client request has been processed"""
-    logger.info(f"Checking status for client={client_id}, request={request_id}, operation={operation}")
+    logger.info("Checking status for client=%s, request=%s, operation=%s", client_id, request_id, operation)
     # Pass operation type to get_processed_result if provided
     result = request_deduplication.get_processed_result(client_id, request_id, operation)
     if result:
-        logger.info(f"Found cached result for client={client_id}, request={request_id}, operation={operation}")
+        logger.info("Found cached result for client=%s, request=%s, operation=%s", client_id, request_id, operation)
         return {"processed": True, "result": result}
     else:
-        logger.info(f"No cached result found for client={client_id}, request={request_id}, operation={operation}")
+        logger.info("No cached result found for client=%s, request=%s, operation=%s", client_id, request_id, operation)
         return {"processed": False}
 
 
 @app.get("/deduplication_stats")
-def get_deduplication_stats():
+async def get_deduplication_stats():
     """Return statistics about the request deduplication service"""
     stats = request_deduplication.get_stats()
-    logger.info(f"Returning deduplication stats: duplicates detected={stats['total_duplicates_detected']}")
+    logger.info("Returning deduplication stats: duplicates detected=%s", stats["total_duplicates_detected"])
     return stats
 
 
 @app.post("/heartbeat")
-def receive_heartbeat(data: dict):
+async def receive_heartbeat(data: dict):
     """Handle heartbeat from leader or other servers"""
     server_id = data.get("server_id")
     timestamp = data.get("timestamp", time.time())
@@ -305,13 +442,13 @@ def receive_heartbeat(data: dict):
         return {"status": "error", "message": "Missing server_id"}
 
     heartbeat_service.record_heartbeat(server_id)
-    logger.debug(f"Received heartbeat from {server_id} at {timestamp}")
+    logger.debug("Received heartbeat from %s at %s", server_id, timestamp)
 
-    return {"status": "ok", "server_id": follower_id, "timestamp": time.time()}
+    return orjson_response({"status": "ok", "server_id": follower_id, "timestamp": time.time()})
 
 
 @app.get("/cluster_status")
-def get_cluster_status():
+async def get_cluster_status():
     """Get status of the leader from this follower's perspective"""
     leader_status = heartbeat_service.get_server_status("leader")
 
@@ -323,27 +460,28 @@ def get_cluster_status():
 
 
 @app.get("/key/{key}/history")
-def get_key_history(key: str):
+async def get_key_history(key: str):
     """Get the version history of a key"""
     history = storage.get_version_history(key)
 
     if history is None:
         raise HTTPException(status_code=404, detail=f"Key not found: {key}")
 
-    versions = sorted(history.keys())
-
-    return {"key": key, "versions": versions, "history": [{"version": v, "value": history[v]} for v in versions]}
+    # The history is already ordered by version
+    return orjson_response(
+        {"key": key, "versions": list(history), "history": [{"version": v, "value": value} for v, value in history.items()]}
+    )
 
 
 @app.get("/key/{key}/versions")
-def get_key_versions(key: str):
+async def get_key_versions(key: str):
     """Get available versions for a key"""
     history = storage.get_version_history(key)
 
     if history is None:
         raise HTTPException(status_code=404, detail=f"Key not found: {key}")
 
-    return {"key": key, "versions": sorted(history.keys()), "latest_version": storage.get_latest_version(key)}
+    return orjson_response({"key": key, "versions": list(history), "latest_version": storage.get_latest_version(key)})
 
 
 @app.post("/compaction/run")
@@ -357,18 +495,18 @@ async def run_compaction(force: bool = Query(False, description="Force compactio
             "entries_removed": entries_removed,
         }
     except Exception as e:
-        logger.error(f"Error during manual compaction: {str(e)}")
+        logger.error("Error during manual compaction: %s", e)
         raise HTTPException(status_code=500, detail=f"Compaction error: {str(e)}") from e
 
 
 @app.get("/compaction/status")
-def get_compaction_status():
+async def get_compaction_status():
     """Get the status of the log compaction service"""
     return compaction_service.get_status()
 
 
 @app.post("/compaction/configure")
-def configure_compaction(
+async def configure_compaction(
     enabled: Optional[bool] = Query(None, description="Enable or disable compaction"),
     interval: Optional[int] = Query(None, description="Compaction interval in seconds"),
 ):
@@ -1,27 +1,49 @@
 import logging
 import os
 import time
-from typing import Any, Dict, Optional, Tuple
-
-import requests
-from fastapi import FastAPI, HTTPException, Query
-
-from pydistributedkv.configurator.settings.base import API_TIMEOUT, compaction_interval, HEARTBEAT_INTERVAL, MAX_SEGMENT_SIZE
-from pydistributedkv.domain.models import ClientRequest, FollowerRegistration, KeyValue, OperationType, WAL
+from itertools import islice
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import orjson
+from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+
+from pydistributedkv.configurator.settings.base import (
+    compaction_interval,
+    HEARTBEAT_INTERVAL,
+    LOG_LEVEL,
+    MAX_SEGMENT_SIZE,
+    REPLICATION_BATCH_WINDOW_US,
+    REPLICATION_MAX_BATCH,
+    REPLICATION_MAX_IN_FLIGHT,
+    VERSION_HISTORY_DEPTH,
+    WAL_FSYNC,
+    WAL_GROUP_COMMIT_DELAY_US,
+    WAL_MAX_BATCH_BYTES,
+)
+from pydistributedkv.domain.models import FollowerRegistration, KeyValue, OperationType, WAL
 from pydistributedkv.service.compaction import LogCompactionService
 from pydistributedkv.service.heartbeat import HeartbeatService
+from pydistributedkv.service.replication import ReplicationService
 from pydistributedkv.service.request_deduplication import RequestDeduplicationService
 from pydistributedkv.service.storage import KeyValueStorage
+from pydistributedkv.utils.common import configure_logging, orjson_response
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+configure_logging(LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
 # Initialize WAL and storage
-wal = WAL(os.getenv("WAL_PATH", "data/leader/wal.log"), max_segment_size=MAX_SEGMENT_SIZE)
-storage = KeyValueStorage(wal)
+wal = WAL(
+    os.getenv("WAL_PATH", "data/leader/wal.log"),
+    max_segment_size=MAX_SEGMENT_SIZE,
+    fsync=WAL_FSYNC,
+    group_commit_delay=WAL_GROUP_COMMIT_DELAY_US / 1_000_000,
+    max_batch_bytes=WAL_MAX_BATCH_BYTES,
+)
+storage = KeyValueStorage(wal, max_history=VERSION_HISTORY_DEPTH)
 
 # Initialize compaction service
 compaction_service = LogCompactionService(storage, compaction_interval=compaction_interval)
@@ -33,6 +55,27 @@ request_deduplication = RequestDeduplicationService(service_name="leader")
 followers: dict[str, str] = {}  # follower_id -> url
 replication_status: dict[str, int] = {}  # follower_id -> last_replicated_id
 
+
+def _record_replication(follower_id: str, last_id: int) -> None:
+    """Advance a follower's replication status, never back, as batches can be acknowledged out of order"""
+    if last_id > replication_status.get(follower_id, 0):
+        replication_status[follower_id] = last_id
+
+
+def _is_follower_healthy(follower_id: str) -> bool:
+    """Whether a follower still gets entries, i.e. is registered and sends heartbeats"""
+    return follower_id in heartbeat_service.get_healthy_servers()
+
+
+# Replication service, batching new entries into /replicate requests per follower
+replication_service = ReplicationService(
+    on_replicated=_record_replication,
+    batch_window=REPLICATION_BATCH_WINDOW_US / 1_000_000,
+    max_batch=REPLICATION_MAX_BATCH,
+    max_in_flight=REPLICATION_MAX_IN_FLIGHT,
+    is_healthy=_is_follower_healthy,
+)
+
 # Create heartbeat service
 leader_id = "leader"
 leader_url = os.getenv("LEADER_URL", "http://localhost:8000")
@@ -48,7 +91,10 @@ async def startup_event():
     # Start compaction service
     await compaction_service.start()
 
-    logger.info("Leader server started with heartbeat and compaction services")
+    # Start replicating new entries to the followers
+    await replication_service.start()
+
+    logger.info("Leader server started with heartbeat, compaction and replication services")
 
 
 @app.on_event("shutdown")
@@ -59,11 +105,17 @@ async def shutdown_event():
     # Stop compaction service
     await compaction_service.stop()
 
+    # Stop replication, dropping entries not sent yet; followers catch up when they register again
+    await replication_service.stop()
+
+    # Flush and close the WAL
+    wal.close()
+
     logger.info("Leader server shutting down")
 
 
 @app.get("/key/{key}")
-def get_key(
+async def get_key(
     key: str,
     version: Optional[int] = Query(None, description="Specific version to retrieve"),
     client_id: Optional[str] = Query(None),
@@ -73,16 +125,14 @@ def get_key(
     # Check for cached response if client tracking is enabled
     cached_response = _check_request_cache(client_id, request_id, key, OperationType.GET)
     if cached_response:
-        return cached_response
+        return orjson_response(cached_response)
 
     # Get value from storage and handle errors
-    result = _get_value_from_storage(key, version)
+    result = storage.get_with_version(key, version)
     if result is None:
-        response = {"status": "error", "message": f"Key not found: {key}"}
-        if version:
-            response["message"] = f"Key not found or version {version} not available: {key}"
-        _cache_response_if_needed(client_id, request_id, key, OperationType.GET, response)
-        raise HTTPException(status_code=404, detail=response["message"])
+        message = f"Key not found or version {version} not available: {key}" if version else f"Key not found: {key}"
+        _cache_response_if_needed(client_id, request_id, key, OperationType.GET, {"status": "error", "message": message})
+        raise HTTPException(status_code=404, detail=message)
 
     value, actual_version = result
 
@@ -92,54 +142,54 @@ def get_key(
     # Cache the response if client tracking is enabled
     _cache_response_if_needed(client_id, request_id, key, OperationType.GET, response)
 
-    return response
+    return orjson_response(response)
 
 
 def _check_request_cache(client_id: Optional[str], request_id: Optional[str], key: str, operation: OperationType) -> Optional[Dict]:
     """Check if this is a duplicate request with a cached response"""
     if not client_id or not request_id:
-        logger.info(f"GET request for key={key} (no client ID)")
+        logger.info("GET request for key=%s (no client ID)", key)
         return None
 
-    logger.info(f"GET request for key={key} from client={client_id}, request={request_id}")
+    logger.info("GET request for key=%s from client=%s, request=%s", key, client_id, request_id)
     previous_response = request_deduplication.get_processed_result(client_id, request_id, operation)
 
     if previous_response is not None:
-        logger.info(f"✅ Returning cached response for GET key={key}, client={client_id}, request={request_id}")
+        logger.info("Returning cached response for GET key=%s, client=%s, request=%s", key, client_id, request_id)
         return previous_response
 
     return None
 
 
-def _get_value_from_storage(key: str, version: Optional[int] = None) -> Optional[Tuple[Any, int]]:
-    """Get a value and its version from storage"""
-    return storage.get_with_version(key, version)
-
-
 def _cache_response_if_needed(
-    client_id: Optional[str], request_id: Optional[str], key: str, operation: OperationType, response: Dict, value: Any = None
+    client_id: Optional[str], request_id: Optional[str], key: str, operation: OperationType, response: Dict
 ) -> None:
     """Cache the response if client tracking is enabled"""
     if not client_id or not request_id:
         return
 
-    client_request = ClientRequest(client_id=client_id, request_id=request_id, operation=operation, key=key, value=value)
-    request_deduplication.mark_request_processed(client_request, response)
+    request_deduplication.mark_processed(client_id, request_id, operation, response, key=key)
 
     status_type = "error" if "status" in response and response["status"] == "error" else "success"
-    logger.info(f"Cached {status_type} response for {operation.name} key={key}, client={client_id}, request={request_id}")
+    logger.info("Cached %s response for %s key=%s, client=%s, request=%s", status_type, operation.name, key, client_id, request_id)
 
 
+# Writes stay synchronous: WAL.append blocks until its group commit is synced, so they belong in the threadpool,
+# where concurrent writers can share one commit without stalling the event loop
 @app.put("/key/{key}")
 def set_key(key: str, kv: KeyValue, client_id: Optional[str] = Query(None), request_id: Optional[str] = Query(None)):
     """Handle PUT request to set a specific key with deduplication support"""
     # Check for cached response if client tracking is enabled
     cached_response = _check_request_cache(client_id, request_id, key, OperationType.SET)
     if cached_response:
-        return cached_response
+        return orjson_response(cached_response)
 
     # Process the request and get the resulting entry
-    entry, version = _process_set_key_request(key, kv.value, kv.version)
+    try:
+        entry, version = _process_set_key_request(key, kv.value, kv.version)
+    except orjson.JSONEncodeError as e:
+        # The log stores values as JSON via orjson, which rejects e.g. integers over 64 bits, NaN and infinities
+        raise HTTPException(status_code=422, detail=f"Value cannot be stored: {e}") from e
 
     # Handle version conflict
     if entry is None:
@@ -153,9 +203,9 @@ def set_key(key: str, kv: KeyValue, client_id: Optional[str] = Query(None), requ
 
     # Create and cache the response
     response = {"status": "ok", "id": entry.id, "key": key, "version": version}
-    _cache_response_if_needed(client_id, request_id, key, OperationType.SET, response, kv.value)
+    _cache_response_if_needed(client_id, request_id, key, OperationType.SET, response)
 
-    return response
+    return orjson_response(response)
 
 
 def _process_set_key_request(key: str, value: Any, version: Optional[int] = None):
@@ -166,7 +216,7 @@ def _process_set_key_request(key: str, value: Any, version: Optional[int] = None
     if entry is None:
         return None, actual_version
 
-    logger.info(f"Added SET entry id={entry.id} for key={key}, version={actual_version}")
+    logger.info("Added SET entry id=%s for key=%s, version=%s", entry.id, key, actual_version)
 
     # Replicate to followers asynchronously
     _replicate_to_followers(entry)
@@ -180,7 +230,7 @@ def delete_key(key: str, client_id: Optional[str] = Query(None), request_id: Opt
     # Check for cached response if client tracking is enabled
     cached_response = _check_request_cache(client_id, request_id, key, OperationType.DELETE)
     if cached_response:
-        return cached_response
+        return orjson_response(cached_response)
 
     # Process the delete request
     entry, status_code, error_msg = _process_delete_request(key)
@@ -197,7 +247,7 @@ def delete_key(key: str, client_id: Optional[str] = Query(None), request_id: Opt
     # Cache the response if client tracking is enabled
     _cache_response_if_needed(client_id, request_id, key, OperationType.DELETE, response)
 
-    return response
+    return orjson_response(response)
 
 
 def _process_delete_request(key: str) -> Tuple[Any, int, Optional[str]]:
@@ -210,7 +260,7 @@ def _process_delete_request(key: str) -> Tuple[Any, int, Optional[str]]:
         logger.warning(error_msg)
         return None, 404, error_msg
 
-    logger.info(f"Added DELETE entry id={entry.id} for key={key}")
+    logger.info("Added DELETE entry id=%s for key=%s", entry.id, key)
 
     # Replicate to followers asynchronously
     _replicate_to_followers(entry)
@@ -220,25 +270,12 @@ def _process_delete_request(key: str) -> Tuple[Any, int, Optional[str]]:
 
 def _replicate_to_followers(entry):
     """Helper method to replicate an entry to all followers"""
-    # Only replicate to healthy followers
-    healthy_followers = heartbeat_service.get_healthy_servers()
-
-    for follower_id, follower_url in healthy_followers.items():
-        try:
-            logger.info(f"Replicating entry id={entry.id} to follower {follower_id}")
-            requests.post(
-                f"{follower_url}/replicate",
-                json={"entries": [entry.model_dump()]},
-                timeout=API_TIMEOUT,
-            )
-            replication_status[follower_id] = entry.id
-        except requests.RequestException as e:
-            logger.error(f"Failed to replicate entry id={entry.id} to follower {follower_id}: {str(e)}")
-            # In production, you'd want better error handling and retry logic
+    # Only replicate to healthy followers; the replication service batches and sends in the background
+    replication_service.replicate(entry, heartbeat_service.get_healthy_servers())
 
 
 @app.post("/register_follower")
-def register_follower(follower_data: FollowerRegistration):
+async def register_follower(follower_data: FollowerRegistration):
     follower_id = follower_data.id
     follower_url = follower_data.url
     last_applied_id = follower_data.last_applied_id
@@ -253,66 +290,77 @@ def register_follower(follower_data: FollowerRegistration):
 
 
 @app.get("/log_entries/{last_id}")
-def get_log_entries(last_id: int):
-    entries = wal.read_from(last_id + 1)
-    return {"entries": [entry.model_dump() for entry in entries]}
+def get_log_entries(last_id: int, limit: Optional[int] = Query(None, ge=1, description="Maximum number of entries to return")):
+    # Followers validate every entry they receive, so pass the stored lines through without re-serializing them
+    lines = wal.iter_raw_lines_from(last_id + 1)
+    if limit is None:
+        # The whole log can be too large to build in memory, so send it as it is read
+        return StreamingResponse(_stream_log_entries(lines), media_type="application/json")
+    return Response(content=b'{"entries":[' + b",".join(islice(lines, limit)) + b"]}", media_type="application/json")
+
+
+# Entries per chunk of a streamed /log_entries response
+STREAM_CHUNK_ENTRIES = 1000
+
+
+def _stream_log_entries(lines: Iterator[bytes]) -> Iterator[bytes]:
+    """Yield the {"entries": [...]} body in chunks of joined lines rather than one small write per entry"""
+    yield b'{"entries":['
+    separator = b""
+    for chunk in iter(lambda: list(islice(lines, STREAM_CHUNK_ENTRIES)), []):
+        yield separator + b",".join(chunk)
+        separator = b","
+    yield b"]}"
 
 
 @app.get("/follower_status")
-def get_follower_status():
+async def get_follower_status():
     return {
         "followers": [{"id": f_id, "url": url, "last_replicated_id": replication_status.get(f_id, 0)} for f_id, url in followers.items()]
     }
 
 
 @app.get("/segments")
-def get_segments():
+async def get_segments():
     """Return information about the WAL segments"""
-    segments = wal.get_segment_files()
     active_segment = wal.get_active_segment()
-
-    segment_info = []
-    for segment in segments:
-        try:
-            size = os.path.getsize(segment)
-            segment_info.append({"path": segment, "size": size, "is_active": segment == active_segment})
-        except FileNotFoundError:
-            pass
+    # Sizes come from the WAL's own bookkeeping rather than a stat per segment
+    segment_info = [{"path": segment, "size": size, "is_active": segment == active_segment} for segment, size in wal.get_segment_sizes()]
 
     return {"segments": segment_info, "total_segments": len(segment_info), "max_segment_size": MAX_SEGMENT_SIZE}
 
 
 @app.get("/keys")
-def get_all_keys():
+async def get_all_keys():
     """Return all keys in the storage"""
     keys = storage.get_all_keys()
-    return {"keys": keys, "count": len(keys)}
+    return orjson_response({"keys": keys, "count": len(keys)})
 
 
 @app.get("/request_status")
-def get_request_status(client_id: str, request_id: str, operation: Optional[str] = Query(None)):
+async def get_request_status(client_id: str, request_id: str, operation: Optional[str] = Query(None)):
     """Check if a client request has been processed"""
-    logger.info(f"Checking status for client={client_id}, request={request_id}, operation={operation}")
+    logger.info("Checking status for client=%s, request=%s, operation=%s", client_id, request_id, operation)
     # Pass operation type to get_processed_result if provided
     result = request_deduplication.get_processed_result(client_id, request_id, operation)
     if result:
-        logger.info(f"Found cached result for client={client_id}, request={request_id}, operation={operation}")
+        logger.info("Found cached result for client=%s, request=%s, operation=%s", client_id, request_id, operation)
         return {"processed": True, "result": result}
     else:
-        logger.info(f"No cached result found for client={client_id}, request={request_id}, operation={operation}")
+        logger.info("No cached result found for client=%s, request=%s, operation=%s", client_id, request_id, operation)
         return {"processed": False}
 
 
 @app.get("/deduplication_stats")
-def get_deduplication_stats():
+async def get_deduplication_stats():
     """Return statistics about the request deduplication service"""
     stats = request_deduplication.get_stats()
-    logger.info(f"Returning deduplication stats: duplicates detected={stats['total_duplicates_detected']}")
+    logger.info("Returning deduplication stats: duplicates detected=%s", stats["total_duplicates_detected"])
     return stats
 
 
 @app.post("/heartbeat")
-def receive_heartbeat(data: dict):
+async def receive_heartbeat(data: dict):
     """Handle heartbeat from followers"""
     server_id = data.get("server_id")
     timestamp = data.get("timestamp", time.time())
@@ -321,13 +369,13 @@ def receive_heartbeat(data: dict):
         return {"status": "error", "message": "Missing server_id"}
 
     heartbeat_service.record_heartbeat(server_id)
-    logger.debug(f"Received heartbeat from {server_id} at {timestamp}")
+    logger.debug("Received heartbeat from %s at %s", server_id, timestamp)
 
-    return {"status": "ok", "server_id": leader_id, "timestamp": time.time()}
+    return orjson_response({"status": "ok", "server_id": leader_id, "timestamp": time.time()})
 
 
 @app.get("/cluster_status")
-def get_cluster_status():
+async def get_cluster_status():
     """Get status of all servers in the cluster"""
     return {
         "leader": {"id": leader_id, "url": leader_url, "status": "healthy"},  # Leader always reports itself as healthy
@@ -337,27 +385,28 @@ def get_cluster_status():
 
 
 @app.get("/key/{key}/history")
-def get_key_history(key: str):
+async def get_key_history(key: str):
     """Get the version history of a key"""
     history = storage.get_version_history(key)
 
     if history is None:
         raise HTTPException(status_code=404, detail=f"Key not found: {key}")
 
-    versions = sorted(history.keys())
-
-    return {"key": key, "versions": versions, "history": [{"version": v, "value": history[v]} for v in versions]}
+    # The history is already ordered by version
+    return orjson_response(
+        {"key": key, "versions": list(history), "history": [{"version": v, "value": value} for v, value in history.items()]}
+    )
 
 
 @app.get("/key/{key}/versions")
-def get_key_versions(key: str):
+async def get_key_versions(key: str):
     """Get available versions for a key"""
     history = storage.get_version_history(key)
 
     if history is None:
         raise HTTPException(status_code=404, detail=f"Key not found: {key}")
 
-    return {"key": key, "versions": sorted(history.keys()), "latest_version": storage.get_latest_version(key)}
+    return orjson_response({"key": key, "versions": list(history), "latest_version": storage.get_latest_version(key)})
 
 
 @app.post("/compaction/run")
@@ -371,18 +420,18 @@ async def run_compaction(force: bool = Query(False, description="Force compactio
             "entries_removed": entries_removed,
         }
     except Exception as e:
-        logger.error(f"Error during manual compaction: {str(e)}")
+        logger.error("Error during manual compaction: %s", e)
         raise HTTPException(status_code=500, detail=f"Compaction error: {str(e)}") from e
 
 
 @app.get("/compaction/status")
-def get_compaction_status():
+async def get_compaction_status():
     """Get the status of the log compaction service"""
     return compaction_service.get_status()
 
 
 @app.post("/compaction/configure")
-def configure_compaction(
+async def configure_compaction(
     enabled: Optional[bool] = Query(None, description="Enable or disable compaction"),
     interval: Optional[int] = Query(None, description="Compaction interval in seconds"),
 ):
@@ -34,7 +34,7 @@ class LogCompactionService:
             return
 
         self.compaction_task = asyncio.create_task(self._compaction_loop())
-        logger.info(f"Started log compaction service (interval: {self.compaction_interval}s)")
+        logger.info("Started log compaction service (interval: %ss)", self.compaction_interval)
 
     def _can_start(self) -> bool:
         """Check if the service can start"""
@@ -79,7 +79,7 @@ class LogCompactionService:
 
     def _handle_loop_error(self, error: Exception) -> None:
         """Handle errors in the compaction loop"""
-        logger.error(f"Error in compaction loop: {str(error)}")
+        logger.error("Error in compaction loop: %s", error)
 
     async def run_compaction(self, force: bool = False) -> Tuple[int, int]:
         """Run log compaction process
@@ -109,7 +109,7 @@ class LogCompactionService:
         time_since_last = (now - self.last_compaction).total_seconds()
 
         if time_since_last < self.min_compaction_interval:
-            logger.info(f"Skipping compaction, last run was {time_since_last:.1f}s ago " f"(min interval: {self.min_compaction_interval}s)")
+            logger.info("Skipping compaction, last run was %.1fs ago (min interval: %ss)", time_since_last, self.min_compaction_interval)
             return True
 
         return False
@@ -126,7 +126,7 @@ class LogCompactionService:
             self._record_compaction_result(result, start_time, now)
             return result
         except Exception as e:
-            logger.error(f"Error during compaction: {str(e)}")
+            logger.error("Error during compaction: %s", e)
             raise
         finally:
             self.compaction_running = False
@@ -147,7 +147,7 @@ class LogCompactionService:
         self._update_compaction_history(compaction_data)
 
         logger.info(
-            f"Compaction completed in {duration:.2f}s: " f"compacted {segments_compacted} segments, removed {entries_removed} entries"
+            "Compaction completed in %.2fs: compacted %s segments, removed %s entries", duration, segments_compacted, entries_removed
         )
 
     def _update_compaction_history(self, compaction_data: Dict[str, Any]) -> None:
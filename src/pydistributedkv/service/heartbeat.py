@@ -1,9 +1,9 @@
 import asyncio
 import logging
 import time
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
-import requests
+import httpx
 
 from pydistributedkv.configurator.settings.base import API_TIMEOUT, HEARTBEAT_INTERVAL, HEARTBEAT_TIMEOUT
 
@@ -23,32 +23,41 @@ class HeartbeatService:
         self._background_tasks = set()
         self._monitor_running = False
         self._send_running = False
+        # Bumped whenever a server is added, removed or changes status, so the healthy snapshot knows it is stale
+        self._membership_version = 0
+        self._healthy_snapshot: Tuple[int, Dict[str, str]] = (-1, {})
+        # One pooled client, so periodic heartbeats reuse their connections
+        self._client = httpx.AsyncClient(timeout=API_TIMEOUT)
 
     def register_server(self, server_id: str, server_url: str) -> None:
         """Register a server to be monitored"""
-        current_time = time.time()
+        # Heartbeat times use the monotonic clock, so wall clock adjustments can't mark servers down
+        current_time = time.monotonic()
         self.servers[server_id] = {"url": server_url, "last_heartbeat": current_time, "status": "healthy"}
-        logger.info(f"{self.service_name}: Registered server {server_id} at {server_url}")
+        self._membership_version += 1
+        logger.info("%s: Registered server %s at %s", self.service_name, server_id, server_url)
 
     def deregister_server(self, server_id: str) -> None:
         """Deregister a server from monitoring"""
         if server_id in self.servers:
             del self.servers[server_id]
-            logger.info(f"{self.service_name}: Deregistered server {server_id}")
+            self._membership_version += 1
+            logger.info("%s: Deregistered server %s", self.service_name, server_id)
 
     def record_heartbeat(self, server_id: str) -> None:
         """Record that a heartbeat was received from a server"""
         if server_id not in self.servers:
-            logger.warning(f"{self.service_name}: Received heartbeat from unknown server {server_id}")
+            logger.warning("%s: Received heartbeat from unknown server %s", self.service_name, server_id)
             return
 
-        current_time = time.time()
+        current_time = time.monotonic()
         self.servers[server_id]["last_heartbeat"] = current_time
 
         # If server was previously down, mark it as healthy
         if self.servers[server_id]["status"] != "healthy":
             self.servers[server_id]["status"] = "healthy"
-            logger.info(f"{self.service_name}: Server {server_id} is now healthy")
+            self._membership_version += 1
+            logger.info("%s: Server %s is now healthy", self.service_name, server_id)
 
     def get_server_status(self, server_id: str) -> Optional[Dict]:
         """Get the status of a specific server"""
@@ -56,19 +65,31 @@ class HeartbeatService:
 
     def get_all_statuses(self) -> Dict:
         """Get the status of all servers"""
+        now, wall_now = time.monotonic(), time.time()
         return {
             server_id: {
                 "url": info["url"],
                 "status": info["status"],
-                "last_heartbeat": info["last_heartbeat"],
-                "seconds_since_last_heartbeat": time.time() - info["last_heartbeat"],
+                # Reported as a wall clock timestamp
+                "last_heartbeat": wall_now - (now - info["last_heartbeat"]),
+                "seconds_since_last_heartbeat": now - info["last_heartbeat"],
             }
             for server_id, info in self.servers.items()
         }
 
     def get_healthy_servers(self) -> Dict[str, str]:
-        """Get a dictionary of healthy server IDs and URLs"""
-        return {server_id: info["url"] for server_id, info in self.servers.items() if info["status"] == "healthy"}
+        """Get a dictionary of healthy server IDs and URLs.
+
+        Every write asks for this, so the dict is rebuilt only when the servers or their statuses changed;
+        it is shared between calls, so don't modify it.
+        """
+        version, healthy = self._healthy_snapshot
+        if version != self._membership_version:
+            # Read the version first, so a change made while building leaves the snapshot stale, not wrong
+            version = self._membership_version
+            healthy = {server_id: info["url"] for server_id, info in list(self.servers.items()) if info["status"] == "healthy"}
+            self._healthy_snapshot = (version, healthy)
+        return healthy
 
     async def start_monitoring(self) -> None:
         """Start monitoring heartbeats from registered servers"""
@@ -79,7 +100,7 @@ class HeartbeatService:
         task = asyncio.create_task(self._monitor_heartbeats())
         self._background_tasks.add(task)
         task.add_done_callback(self._background_tasks.discard)
-        logger.info(f"{self.service_name}: Started heartbeat monitoring")
+        logger.info("%s: Started heartbeat monitoring", self.service_name)
 
     async def start_sending(self) -> None:
         """Start sending heartbeats to registered servers"""
@@ -87,10 +108,13 @@ class HeartbeatService:
             return
 
         self._send_running = True
+        # stop() closes the client, so a restarted service needs a new one
+        if self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=API_TIMEOUT)
         task = asyncio.create_task(self._send_heartbeats())
         self._background_tasks.add(task)
         task.add_done_callback(self._background_tasks.discard)
-        logger.info(f"{self.service_name}: Started sending heartbeats")
+        logger.info("%s: Started sending heartbeats", self.service_name)
 
     async def stop(self) -> None:
         """Stop all heartbeat activities"""
@@ -99,12 +123,13 @@ class HeartbeatService:
         # Wait for tasks to complete
         for task in self._background_tasks:
             task.cancel()
-        logger.info(f"{self.service_name}: Stopped heartbeat service")
+        await self._client.aclose()
+        logger.info("%s: Stopped heartbeat service", self.service_name)
 
     async def _monitor_heartbeats(self) -> None:
         """Monitor heartbeats and mark servers as down if they miss heartbeats"""
         while self._monitor_running:
-            current_time = time.time()
+            current_time = time.monotonic()
             self._check_server_heartbeats(current_time)
             await asyncio.sleep(HEARTBEAT_INTERVAL)
 
@@ -123,38 +148,31 @@ class HeartbeatService:
             return
 
         info["status"] = "down"
-        logger.warning(f"{self.service_name}: Server {server_id} marked as down. " f"No heartbeat for {elapsed_time:.1f}s")
+        self._membership_version += 1
+        logger.warning("%s: Server %s marked as down. No heartbeat for %.1fs", self.service_name, server_id, elapsed_time)
 
     async def _send_heartbeats(self) -> None:
         """Send periodic heartbeats to all registered servers"""
+        next_send = time.monotonic()
         while self._send_running:
             await self._send_heartbeats_to_all_servers()
-            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            # Keep a fixed period, however long the round took
+            next_send += HEARTBEAT_INTERVAL
+            await asyncio.sleep(max(0.0, next_send - time.monotonic()))
 
     async def _send_heartbeats_to_all_servers(self) -> None:
         """Send heartbeats to all registered servers in parallel"""
-        for server_id, info in list(self.servers.items()):
-            # Send heartbeat even to servers marked as down (to detect recovery)
-            self._schedule_heartbeat(server_id, info)
-
-    def _schedule_heartbeat(self, server_id: str, info: dict) -> None:
-        """Schedule a non-blocking heartbeat to a specific server"""
-        try:
-            server_url = info["url"]
-            asyncio.create_task(self._send_single_heartbeat(server_id, server_url))
-        except Exception as e:
-            logger.error(f"{self.service_name}: Error preparing heartbeat to {server_id}: {str(e)}")
+        # Send heartbeat even to servers marked as down (to detect recovery)
+        await asyncio.gather(*(self._send_single_heartbeat(server_id, info["url"]) for server_id, info in list(self.servers.items())))
 
     async def _send_single_heartbeat(self, server_id: str, server_url: str) -> None:
         """Send a single heartbeat to a specific server"""
         try:
-            response = await asyncio.to_thread(
-                requests.post, f"{server_url}/heartbeat", json={"server_id": self.server_id, "timestamp": time.time()}, timeout=API_TIMEOUT
-            )
+            response = await self._client.post(f"{server_url}/heartbeat", json={"server_id": self.server_id, "timestamp": time.time()})
 
             if response.status_code == 200:
-                logger.debug(f"{self.service_name}: Heartbeat sent to {server_id}")
+                logger.debug("%s: Heartbeat sent to %s", self.service_name, server_id)
             else:
-                logger.warning(f"{self.service_name}: Heartbeat to {server_id} failed with status {response.status_code}")
-        except requests.RequestException as e:
-            logger.warning(f"{self.service_name}: Failed to send heartbeat to {server_id}: {str(e)}")
+                logger.warning("%s: Heartbeat to %s failed with status %s", self.service_name, server_id, response.status_code)
+        except httpx.HTTPError as e:
+            logger.warning("%s: Failed to send heartbeat to %s: %s", self.service_name, server_id, e)
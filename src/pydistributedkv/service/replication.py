@@ -0,0 +1,270 @@
+import asyncio
+import heapq
+import logging
+import time
+from collections import deque
+from statistics import fmean
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from pydistributedkv.configurator.settings.base import API_TIMEOUT
+from pydistributedkv.domain.models import LogEntry
+from pydistributedkv.utils.common import JSON_HEADERS
+
+logger = logging.getLogger(__name__)
+
+# Backoff between attempts to send a batch the follower did not accept, in seconds
+RETRY_INITIAL_DELAY = 0.05
+RETRY_MAX_DELAY = 2.0
+# Attempts before giving up on a follower that stays healthy but does not accept a batch, about a minute
+RETRY_MAX_ATTEMPTS = 30
+
+# Longest time, in seconds, to hold back entries queued ahead of the one a follower expects next
+REORDER_TIMEOUT = 0.01
+
+# An entry ID with the entry already encoded as JSON, shared by every follower's queue
+EncodedEntry = Tuple[int, bytes]
+
+
+class FollowerQueue:
+    """Entries waiting to be sent to one follower, handed out in ID order.
+
+    Worker threads queue entries as their writes complete, and writers released by the same group commit can
+    queue them out of order. An entry past the ID the follower expects next is held back until the missing ones
+    arrive, so the follower does not reject its batch, or until a short timeout passes.
+    """
+
+    def __init__(self) -> None:
+        self._entries: List[EncodedEntry] = []  # heap, lowest ID first
+        self._put = asyncio.Event()
+        # ID the follower expects next, unknown until the first batch is taken
+        self.next_id: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, entry: EncodedEntry) -> None:
+        heapq.heappush(self._entries, entry)
+        self._put.set()
+
+    async def wait(self, reorder_timeout: float) -> None:
+        """Wait for an entry, then up to reorder_timeout for the follower's next expected one"""
+        while not self._entries:
+            await self._wait_for_put()
+        if self._in_order():
+            return
+        try:
+            await asyncio.wait_for(self._wait_in_order(), reorder_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Entry id=%s was not queued in time, sending from id=%s", self.next_id, self._entries[0][0])
+
+    def take(self, limit: int) -> List[EncodedEntry]:
+        """Take the lowest queued entry and those with consecutive IDs after it, up to limit entries"""
+        batch = [heapq.heappop(self._entries)]
+        while len(batch) < limit and self._entries and self._entries[0][0] == batch[-1][0] + 1:
+            batch.append(heapq.heappop(self._entries))
+        self.next_id = batch[-1][0] + 1
+        return batch
+
+    def _in_order(self) -> bool:
+        return self.next_id is None or self._entries[0][0] <= self.next_id
+
+    async def _wait_in_order(self) -> None:
+        while not self._in_order():
+            await self._wait_for_put()
+
+    async def _wait_for_put(self) -> None:
+        self._put.clear()
+        await self._put.wait()
+
+
+class ReplicationService:
+    """Service that ships new log entries to the followers in batches.
+
+    Each follower gets a queue and a sender task, and queued entries go out together in a single /replicate
+    request. A batch is sent right away if the previous one left at least half a round trip ago, so writes
+    under low load add no latency; otherwise it fills until then, waiting at most batch_window seconds.
+    A batch the follower does not accept is retried with backoff, holding its in-flight slot, until the follower
+    is no longer healthy or RETRY_MAX_ATTEMPTS failed; the follower's queue is then dropped, and the catch-up sync
+    it runs when it registers again fills the gap.
+    Followers reject a batch that would leave a gap in their log, so sending one at a time (max_in_flight=1)
+    keeps batches in order; a higher limit pipelines them, at the cost of retries whenever they arrive out
+    of order.
+    """
+
+    def __init__(
+        self,
+        on_replicated: Callable[[str, int], None],
+        batch_window: float = 0.001,
+        max_batch: int = 256,
+        max_in_flight: int = 1,
+        client: Optional[httpx.AsyncClient] = None,
+        is_healthy: Optional[Callable[[str], bool]] = None,
+    ):
+        """
+        Initialize the replication service.
+
+        Args:
+            on_replicated: Called with (follower_id, last_entry_id) once a follower accepted a batch
+            batch_window: Longest time, in seconds, to wait after an entry for more to join its batch
+            max_batch: Maximum number of entries per /replicate request
+            max_in_flight: Maximum number of unacknowledged /replicate requests per follower
+            client: HTTP client to send with, a pooled one is created if not given
+            is_healthy: Called with a follower_id between retries, a follower it returns False for is given up on
+        """
+        self.on_replicated = on_replicated
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_in_flight = max_in_flight
+        self.is_healthy = is_healthy or (lambda follower_id: True)
+        self._client = client or self._new_client()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queues: Dict[str, FollowerQueue] = {}
+        self._urls: Dict[str, str] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._sends: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def _new_client() -> httpx.AsyncClient:
+        # Open connections are already bounded by max_in_flight per follower; keep them all alive rather than
+        # httpx's default of 20, so pipelined batches to many followers don't reconnect
+        return httpx.AsyncClient(timeout=API_TIMEOUT, limits=httpx.Limits(max_keepalive_connections=None))
+
+    async def start(self) -> None:
+        """Start accepting entries; senders run on the current event loop"""
+        # stop() closes the client, so a restarted service needs a new one
+        if self._client.is_closed:
+            self._client = self._new_client()
+        self._loop = asyncio.get_running_loop()
+        logger.info(
+            "Started replication service (batch window: %ss, max batch: %s, max in flight: %s)",
+            self.batch_window,
+            self.max_batch,
+            self.max_in_flight,
+        )
+
+    async def stop(self) -> None:
+        """Stop all senders, dropping the entries they have not sent, and close the HTTP client"""
+        tasks = [*self._tasks.values(), *self._sends]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._sends.clear()
+        self._queues.clear()
+        self._urls.clear()
+        self._loop = None
+        await self._client.aclose()
+        logger.info("Stopped replication service")
+
+    def replicate(self, entry: LogEntry, followers: Dict[str, str]) -> None:
+        """Queue an entry for each of the given followers (follower_id -> url).
+
+        Safe to call from the worker threads that run synchronous request handlers.
+        """
+        if self._loop is None:
+            logger.warning("Replication service is not running, entry id=%s not replicated", entry.id)
+            return
+        self._loop.call_soon_threadsafe(self._enqueue, entry, followers)
+
+    def _enqueue(self, entry: LogEntry, followers: Dict[str, str]) -> None:
+        # Encode once here rather than in every follower's batch
+        encoded = (entry.id, entry.to_json_bytes())
+        for follower_id, follower_url in followers.items():
+            # A follower that registers again may come back on another URL
+            self._urls[follower_id] = follower_url
+            queue = self._queues.get(follower_id)
+            if queue is None:
+                queue = self._start_sender(follower_id)
+            queue.put(encoded)
+
+    def _start_sender(self, follower_id: str) -> FollowerQueue:
+        queue = FollowerQueue()
+        self._queues[follower_id] = queue
+        self._tasks[follower_id] = asyncio.create_task(self._send_loop(follower_id, queue))
+        return queue
+
+    async def _send_loop(self, follower_id: str, queue: FollowerQueue) -> None:
+        """Send the queued entries to one follower, keeping up to max_in_flight batches unacknowledged"""
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        # Round trip times of the latest acknowledged batches
+        rtts: Deque[float] = deque(maxlen=8)
+        last_send = 0.0
+        while True:
+            batch = await self._next_batch(queue, rtts, last_send)
+            await in_flight.acquire()
+            last_send = time.monotonic()
+            send = asyncio.create_task(self._send_batch(follower_id, queue, batch, rtts))
+            self._sends.add(send)
+            send.add_done_callback(self._sends.discard)
+            send.add_done_callback(lambda _: in_flight.release())
+
+    def _batch_delay(self, rtts: Deque[float], last_send: float) -> float:
+        """How long a new batch should fill: until half the average round trip after the previous send"""
+        if not rtts:
+            return 0.0
+        return min(self.batch_window, max(0.0, last_send + fmean(rtts) / 2 - time.monotonic()))
+
+    async def _next_batch(self, queue: FollowerQueue, rtts: Deque[float], last_send: float) -> List[EncodedEntry]:
+        """Wait for the follower's next entry, then take those queued within the batch delay, up to max_batch entries"""
+        await queue.wait(REORDER_TIMEOUT)
+        delay = self._batch_delay(rtts, last_send)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return queue.take(self.max_batch)
+
+    async def _send_batch(self, follower_id: str, queue: FollowerQueue, batch: List[EncodedEntry], rtts: Deque[float]) -> None:
+        """Send a batch until the follower accepts it, or give up on the follower along with its queue"""
+        content = b'{"entries":[' + b",".join(line for _, line in batch) + b"]}"
+        if await self._retry_batch(follower_id, queue, batch, content, rtts):
+            # Pipelined batches can be acknowledged out of order, on_replicated must keep the highest ID
+            self.on_replicated(follower_id, batch[-1][0])
+        else:
+            # Dropping only this batch would leave a gap in the follower's log, every later batch would be rejected
+            self._drop_follower(follower_id, queue)
+
+    async def _retry_batch(
+        self, follower_id: str, queue: FollowerQueue, batch: List[EncodedEntry], content: bytes, rtts: Deque[float]
+    ) -> bool:
+        """Post a batch with backoff until accepted; False once the follower is given up on, or after RETRY_MAX_ATTEMPTS"""
+        delay = RETRY_INITIAL_DELAY
+        for _ in range(RETRY_MAX_ATTEMPTS):
+            if await self._post_batch(follower_id, batch, content, rtts):
+                return True
+            if not self._still_sending_to(follower_id, queue):
+                return False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RETRY_MAX_DELAY)
+        return False
+
+    def _still_sending_to(self, follower_id: str, queue: FollowerQueue) -> bool:
+        """Whether the follower is healthy and its queue was not dropped, e.g. by a pipelined batch giving up"""
+        return self._queues.get(follower_id) is queue and self.is_healthy(follower_id)
+
+    def _drop_follower(self, follower_id: str, queue: FollowerQueue) -> None:
+        """Stop sending to a follower and drop its queued entries; it catches up when it registers again"""
+        # A sender started after this queue was dropped belongs to a newer registration, leave it be
+        if self._queues.get(follower_id) is not queue:
+            return
+        logger.warning("Giving up on follower %s, dropping %s queued entries until it catches up", follower_id, len(queue))
+        del self._queues[follower_id]
+        self._tasks.pop(follower_id).cancel()
+
+    async def _post_batch(self, follower_id: str, batch: List[EncodedEntry], content: bytes, rtts: Deque[float]) -> bool:
+        started = time.monotonic()
+        try:
+            logger.info("Replicating entries id=%s..%s to follower %s", batch[0][0], batch[-1][0], follower_id)
+            # Look the URL up on every attempt, a follower that registers again may come back on another one
+            response = await self._client.post(f"{self._urls[follower_id]}/replicate", content=content, headers=JSON_HEADERS)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.error("Failed to replicate entries id=%s..%s to follower %s: %s", batch[0][0], batch[-1][0], follower_id, e)
+            return False
+        except Exception:
+            # Anything else would end the send task and silently lose the batch, retry it like a failed request
+            logger.exception("Unexpected error replicating entries id=%s..%s to follower %s", batch[0][0], batch[-1][0], follower_id)
+            return False
+
+        rtts.append(time.monotonic() - started)
+        return True
@@ -5,8 +5,6 @@ from typing import Any, Dict, List, Optional, Tuple
 
 from pydistributedkv.domain.models import ClientRequest
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -28,6 +26,8 @@ class RequestDeduplicationService:
         self.max_cache_size = max_cache_size
         self.expiry_seconds = expiry_seconds
         self.service_name = service_name
+        # Expired entries are swept at most every tenth of the expiry time, not on every call
+        self._next_cleanup = 0.0
 
         # Statistics
         self.total_requests_cached = 0
@@ -39,17 +39,21 @@ class RequestDeduplicationService:
         self.different_operation_duplicates = 0
 
         logger.info(
-            f"[{service_name}] Request deduplication service initialized with max_cache_size={max_cache_size}, expiry_seconds={expiry_seconds}"
+            "[%s] Request deduplication service initialized with max_cache_size=%s, expiry_seconds=%s",
+            service_name,
+            max_cache_size,
+            expiry_seconds,
         )
 
     def mark_request_processed(self, client_request: ClientRequest, result: Any):
         """Mark a client request as processed with its result"""
+        self.mark_processed(client_request.client_id, client_request.request_id, client_request.operation, result, key=client_request.key)
+
+    def mark_processed(self, client_id: str, request_id: str, operation: Optional[str], result: Any, key: Optional[str] = None) -> None:
+        """Mark a request as processed from its plain identifiers, without building a ClientRequest model"""
         self._clean_expired_requests()
 
-        client_id = client_request.client_id
-        request_id = client_request.request_id
-        operation = client_request.operation or "UNKNOWN"
-        key = client_request.key or "N/A"
+        operation = operation or "UNKNOWN"
 
         # Use a tuple of (request_id, operation) as the cache key
         cache_key = (request_id, str(operation))
@@ -58,7 +62,14 @@ class RequestDeduplicationService:
         self.processed_requests[client_id][cache_key] = (time.time(), result)
         self.total_requests_cached += 1
 
-        logger.info(f"[{self.service_name}] Cached result for client={client_id}, request={request_id}, operation={operation}, key={key}")
+        logger.info(
+            "[%s] Cached result for client=%s, request=%s, operation=%s, key=%s",
+            self.service_name,
+            client_id,
+            request_id,
+            operation,
+            key or "N/A",
+        )
 
         # If we've exceeded our cache size, remove the oldest entries
         if len(self.processed_requests) > self.max_cache_size:
@@ -102,15 +113,22 @@ class RequestDeduplicationService:
             return None
 
         timestamp, result = self.processed_requests[client_id][cache_key]
-        self.total_duplicates_detected += 1
-        self.same_operation_duplicates += 1
-
         # Calculate how long ago this request was first processed
         time_since_original = time.time() - timestamp
+        # The entry may have expired since the last sweep
+        if time_since_original > self.expiry_seconds:
+            return None
+
+        self.total_duplicates_detected += 1
+        self.same_operation_duplicates += 1
 
         logger.warning(
-            f"[{self.service_name}] DUPLICATE REQUEST DETECTED: client={client_id}, request={request_id}, "
-            f"operation={operation}, originally processed {time_since_original:.2f} seconds ago"
+            "[%s] DUPLICATE REQUEST DETECTED: client=%s, request=%s, operation=%s, originally processed %.2f seconds ago",
+            self.service_name,
+            client_id,
+            request_id,
+            operation,
+            time_since_original,
         )
         return result
 
@@ -123,19 +141,27 @@ class RequestDeduplicationService:
             if req_id == request_id and op != str(operation):
                 self.different_operation_duplicates += 1
                 logger.warning(
-                    f"[{self.service_name}] DIFFERENT OPERATION ATTEMPTED: client={client_id}, request={request_id}, "
-                    f"previous_op={op}, current_op={operation}"
+                    "[%s] DIFFERENT OPERATION ATTEMPTED: client=%s, request=%s, previous_op=%s, current_op=%s",
+                    self.service_name,
+                    client_id,
+                    request_id,
+                    op,
+                    operation,
                 )
                 break
 
     def _clean_expired_requests(self):
-        """Remove expired entries from the cache"""
+        """Remove expired entries from the cache, if the last sweep was long enough ago"""
         current_time = time.time()
+        if current_time < self._next_cleanup:
+            return
+        self._next_cleanup = current_time + self.expiry_seconds / 10
+
         expired_count = self._remove_expired_entries(current_time)
         self._remove_empty_clients()
 
         if expired_count > 0:
-            logger.info(f"[{self.service_name}] Cleaned up {expired_count} expired cache entries")
+            logger.info("[%s] Cleaned up %s expired cache entries", self.service_name, expired_count)
             self.total_cache_cleanups += 1
 
     def _remove_expired_entries(self, current_time: float) -> int:
@@ -169,7 +195,7 @@ class RequestDeduplicationService:
         if entries_to_remove <= 0:
             return
 
-        logger.info(f"[{self.service_name}] Cache size limit reached, removing {entries_to_remove} oldest entries")
+        logger.info("[%s] Cache size limit reached, removing %s oldest entries", self.service_name, entries_to_remove)
 
         # Get sorted entries by age (oldest first)
         oldest_entries = self._get_entries_sorted_by_age()
@@ -1,29 +1,37 @@
+import logging
 from typing import Any, Dict, List, Optional, Tuple
 
 from pydistributedkv.domain.models import LogEntry, OperationType, VersionedValue, WAL
 
+logger = logging.getLogger(__name__)
+
 
 class KeyValueStorage:
-    def __init__(self, wal: WAL):
+    def __init__(self, wal: WAL, max_history: Optional[int] = None):
         self.wal = wal
+        # Previous versions kept per key, unbounded if None
+        self.max_history = max_history
         # Changed from Dict[str, Any] to Dict[str, VersionedValue]
         self.data: Dict[str, VersionedValue] = {}
+        # Snapshot of the keys with the keys version it was built at, rebuilt only after a key was added or removed
+        self._keys_version = 0
+        self._keys_cache: Tuple[int, List[str]] = (-1, [])
         self._replay_log()
 
     def _replay_log(self):
         """Replay the WAL to rebuild the in-memory state"""
-        entries = self.wal.read_from(0)
-        entries_count = len(entries)
-        print(f"Replaying {entries_count} entries from WAL...")
+        logger.info("Replaying entries from WAL...")
 
-        for i, entry in enumerate(entries):
+        # Stream the entries instead of loading the whole log first
+        entries_count = 0
+        for entries_count, entry in enumerate(self.wal.iter_from(0), 1):
             self._apply_log_entry(entry)
 
             # Log progress for larger datasets
-            if entries_count > 1000 and i % 1000 == 0:
-                print(f"Replayed {i}/{entries_count} entries...")
+            if entries_count % 1000 == 0:
+                logger.debug("Replayed %s entries...", entries_count)
 
-        print(f"Finished replaying {entries_count} entries, data store contains {len(self.data)} keys")
+        logger.info("Finished replaying %s entries, data store contains %s keys", entries_count, len(self.data))
 
     def _apply_log_entry(self, entry: LogEntry) -> None:
         """Apply a single log entry to the in-memory state"""
@@ -37,14 +45,14 @@ class KeyValueStorage:
         version = entry.version if entry.version is not None else 1
 
         if entry.key in self.data:
-            self.data[entry.key].update(entry.value, version)
+            self.data[entry.key].update(entry.value, version, self.max_history)
         else:
-            self.data[entry.key] = VersionedValue(current_version=version, value=entry.value)
+            self._insert_key(entry.key, entry.value, version)
 
     def _apply_delete_operation(self, entry: LogEntry) -> None:
         """Apply DELETE operation to the in-memory state"""
         if entry.key in self.data:
-            del self.data[entry.key]
+            self._remove_key(entry.key)
 
     def set(self, key: str, value: Any, version: Optional[int] = None) -> Tuple[LogEntry | None, int]:
         """Set a key-value pair and log the operation
@@ -92,23 +100,32 @@ class KeyValueStorage:
     def _update_in_memory_state(self, key: str, value: Any, version: int) -> None:
         """Update the in-memory state with the new value and version"""
         if key in self.data:
-            self.data[key].update(value, version)
+            self.data[key].update(value, version, self.max_history)
         else:
-            self.data[key] = VersionedValue(current_version=version, value=value)
+            self._insert_key(key, value, version)
+
+    def _insert_key(self, key: str, value: Any, version: int) -> None:
+        self.data[key] = VersionedValue(current_version=version, value=value)
+        self._keys_version += 1
+
+    def _remove_key(self, key: str) -> None:
+        del self.data[key]
+        self._keys_version += 1
 
     def get(self, key: str, version: Optional[int] = None) -> Optional[Any]:
         """Get a value by key and optional version"""
-        if key not in self.data:
+        versioned_value = self.data.get(key)
+        if versioned_value is None:
             return None
 
-        return self.data[key].get_value(version)
+        return versioned_value.get_value(version)
 
     def get_with_version(self, key: str, version: Optional[int] = None) -> Optional[Tuple[Any, int]]:
         """Get a value and its version by key"""
-        if key not in self.data:
+        versioned_value = self.data.get(key)
+        if versioned_value is None:
             return None
 
-        versioned_value = self.data[key]
         value = versioned_value.get_value(version)
 
         if value is None:
@@ -118,17 +135,14 @@ class KeyValueStorage:
         return (value, actual_version)
 
     def get_version_history(self, key: str) -> Optional[Dict[int, Any]]:
-        """Get the version history for a key"""
-        if key not in self.data:
+        """Get the version history for a key, ordered from the oldest to the latest version"""
+        versioned_value = self.data.get(key)
+        if versioned_value is None:
             return None
 
-        versioned_value = self.data[key]
-        # Start with the current version
-        history = {versioned_value.current_version: versioned_value.value}
-
-        # Add all historical versions if they exist
-        if versioned_value.history:
-            history.update(versioned_value.history)
+        # Versions are recorded in increasing order, so copying the history keeps it sorted
+        history = dict(versioned_value.history) if versioned_value.history else {}
+        history[versioned_value.current_version] = versioned_value.value
 
         return history
 
@@ -136,7 +150,7 @@ class KeyValueStorage:
         """Delete a key and log the operation"""
         if key in self.data:
             entry = self.wal.append(OperationType.DELETE, key)
-            del self.data[key]
+            self._remove_key(key)
             return entry
         return None
 
@@ -149,8 +163,15 @@ class KeyValueStorage:
         return last_id
 
     def get_all_keys(self) -> List[str]:
-        """Get a list of all keys in the storage"""
-        return list(self.data.keys())
+        """Get a list of all keys in the storage; the list is shared between calls, so don't modify it"""
+        version, keys = self._keys_cache
+        if version != self._keys_version:
+            # Read the version first: a write racing the rebuild then leaves the snapshot stale, so it is rebuilt
+            # on the next call, instead of the write's invalidation being overwritten by an outdated list
+            version = self._keys_version
+            keys = list(self.data)
+            self._keys_cache = (version, keys)
+        return keys
 
     def get_latest_version(self, key: str) -> Optional[int]:
         """Get the latest version number for a key"""
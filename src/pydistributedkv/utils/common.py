@@ -1 +1,44 @@
 """Common shared file for supplementary utils"""
+
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+import orjson
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# Headers for request bodies serialized with orjson
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def orjson_response(content: Any) -> Response:
+    """Serialize content with orjson into a JSON response, skipping FastAPI's jsonable_encoder and stdlib json."""
+    try:
+        return Response(content=orjson.dumps(content), media_type="application/json")
+    except orjson.JSONEncodeError:
+        # orjson rejects some content stdlib json accepts, such as integers over 64 bits
+        return JSONResponse(content=jsonable_encoder(content))
+
+
+def configure_logging(level: str) -> None:
+    """Configure the root logger like logging.basicConfig, but write records from a background thread.
+
+    Request handlers only put records on an in-memory queue, instead of taking the stream handler's lock
+    and writing to stderr themselves. Does nothing if the root logger already has handlers.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    root.setLevel(level)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, stream_handler)
+    listener.start()
+    # Stopping drains the queue, so records logged during shutdown are still written
+    atexit.register(listener.stop)
@@ -0,0 +1,62 @@
+from pydistributedkv.domain.models import IdIntervalSet
+
+
+def test_sequential_ids_collapse_into_one_range():
+    ids = IdIntervalSet()
+    for entry_id in range(1, 1001):
+        ids.add(entry_id)
+
+    assert ids.intervals() == [[1, 1000]]
+    assert len(ids) == 1000
+    assert 1 in ids
+    assert 1000 in ids
+    assert 0 not in ids
+    assert 1001 not in ids
+
+
+def test_out_of_order_ids_coalesce_when_gaps_fill():
+    ids = IdIntervalSet()
+    for entry_id in [1, 2, 5, 3, 7]:
+        ids.add(entry_id)
+
+    assert ids.intervals() == [[1, 3], [5, 5], [7, 7]]
+    assert 4 not in ids
+    assert 6 not in ids
+
+    ids.add(4)
+    ids.add(6)
+    assert ids.intervals() == [[1, 7]]
+
+
+def test_duplicate_ids_are_ignored():
+    ids = IdIntervalSet([[1, 5]])
+    ids.add(3)
+    ids.add(5)
+
+    assert ids.intervals() == [[1, 5]]
+    assert len(ids) == 5
+
+
+def test_add_range_merges_overlapping_ranges():
+    ids = IdIntervalSet([[1, 2], [5, 6], [10, 12]])
+    ids.add_range(3, 10)
+
+    assert ids.intervals() == [[1, 12]]
+    assert ids.min() == 1
+    assert ids.max() == 12
+
+
+def test_update_with_another_set():
+    ids = IdIntervalSet([[1, 3]])
+    ids.update(IdIntervalSet([[4, 6], [9, 9]]))
+
+    assert ids.intervals() == [[1, 6], [9, 9]]
+
+
+def test_empty_set():
+    ids = IdIntervalSet()
+
+    assert len(ids) == 0
+    assert 1 not in ids
+    assert ids.min() == 0
+    assert ids.max() == 0
@@ -2,8 +2,14 @@ import json
 import os
 import shutil
 import tempfile
+import zlib
+from unittest.mock import patch
 
-from pydistributedkv.domain.models import LogEntry, OperationType, WAL
+import google_crc32c
+import orjson
+import pytest
+
+from pydistributedkv.domain.models import LogEntry, LogEntryBatch, OperationType, WAL
 
 
 def test_log_entry_crc_calculation():
@@ -72,6 +78,15 @@ def test_wal_skips_invalid_crc():
         assert len(entries) == 1
         assert entries[0].id == 1
 
+        # Unless the caller opts out of CRC verification
+        unverified = wal2.read_from(0, verify_crc=False)
+        assert [entry.value for entry in unverified] == ["value1", "corrupted_value"]
+
+        # Raw iteration yields the stored dicts, applying the same CRC check
+        assert list(wal2.iter_raw_from(0)) == [entries[0].to_raw_dict()]
+        assert [entry["value"] for entry in wal2.iter_raw_from(2, verify_crc=False)] == ["corrupted_value"]
+        assert [orjson.loads(line) for line in wal2.iter_raw_lines_from(0)] == list(wal2.iter_raw_from(0, verify_crc=False))
+
     finally:
         shutil.rmtree(temp_dir)
 
@@ -190,5 +205,174 @@ def test_corrupted_json_handling():
         assert valid_entries[1].id == 2
         assert valid_entries[2].id == 3
 
+        # Raw lines skip the corrupted one too, so they can be joined into a valid JSON array
+        lines = list(wal2.iter_raw_lines_from(2))
+        assert [orjson.loads(line)["id"] for line in lines] == [2, 3]
+        assert len(orjson.loads(b"[" + b",".join(lines) + b"]")) == 2
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_wal_accepts_legacy_json_crc():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        log_path = os.path.join(temp_dir, "wal.log")
+        wal = WAL(log_path)
+        active_segment = wal.get_active_segment()
+
+        # Entry written by an older version, with the CRC computed over stdlib json output
+        legacy_entry = {"id": 1, "operation": "SET", "key": "key1", "value": "value1", "version": 1}
+        legacy_entry["crc"] = zlib.crc32(json.dumps(legacy_entry, sort_keys=True).encode())
+
+        with open(active_segment, "w") as f:
+            f.write(json.dumps(legacy_entry) + "\n")
+
+        wal2 = WAL(log_path)
+        assert wal2.get_last_id() == 1
+
+        entries = wal2.read_from(0)
+        assert len(entries) == 1
+        assert entries[0].value == "value1"
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_log_entry_raw_dict_matches_model_dump():
+    entry = LogEntry(id=3, operation=OperationType.DELETE, key="k", value={"nested": [1, 2]}, version=2)
+    entry.crc = entry.calculate_crc()
+
+    assert entry.to_raw_dict() == entry.model_dump(mode="json")
+    assert entry.validate_crc() is True
+
+
+def test_wal_accepts_sorted_json_crc32c():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        log_path = os.path.join(temp_dir, "wal.log")
+        wal = WAL(log_path)
+        active_segment = wal.get_active_segment()
+
+        # Entry checksummed as CRC-32C over sorted-key JSON, before the fixed field layout
+        entry = {"id": 1, "operation": "SET", "key": "key1", "value": {"b": 1, "a": 2}, "version": 1}
+        entry["crc"] = google_crc32c.value(orjson.dumps(entry, option=orjson.OPT_SORT_KEYS))
+
+        with open(active_segment, "wb") as f:
+            f.write(orjson.dumps(entry) + b"\n")
+
+        wal2 = WAL(log_path)
+        assert wal2.get_last_id() == 1
+        assert wal2.read_from(0)[0].value == {"b": 1, "a": 2}
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_log_entry_caches_content_crc():
+    entry = LogEntry(id=1, operation=OperationType.SET, key="k", value="v")
+
+    with patch("pydistributedkv.domain.models.google_crc32c.value", wraps=google_crc32c.value) as mock_value:
+        entry.crc = entry.calculate_crc()
+        assert entry.validate_crc() is True
+        assert entry.validate_crc() is True
+        assert mock_value.call_count == 1
+
+        # Reassigning a field invalidates the cached CRC
+        entry.value = "changed"
+        assert entry.validate_crc() is False
+
+
+def test_log_entry_invalid_crc_checks_each_scheme_once():
+    entry = LogEntry(id=1, operation=OperationType.SET, key="k", value="v", crc=12345)
+
+    with patch("pydistributedkv.domain.models.google_crc32c.value", wraps=google_crc32c.value) as mock_value:
+        assert entry.validate_crc() is False
+        # The current scheme once, then only the older CRC-32C scheme; the legacy one uses zlib
+        assert mock_value.call_count == 2
+
+
+def test_wal_append_line_matches_entry_serialization():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        wal = WAL(os.path.join(temp_dir, "wal.log"))
+        entry = wal.append(OperationType.SET, 'key "quoted"', {"b": [1, None], "a": "ü"}, version=3)
+        wal.close()
+
+        with open(wal.get_active_segment(), "rb") as f:
+            stored = orjson.loads(f.readline())
+
+        # The hand-built line decodes to the same entry, with a CRC over the same canonical bytes
+        assert stored == entry.to_raw_dict()
+        assert LogEntry(**stored).validate_crc() is True
+
+        # The entry reuses the bytes it was written with rather than encoding itself again
+        with open(wal.get_active_segment(), "rb") as f:
+            assert entry.to_json_bytes() == f.readline().rstrip()
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_wal_append_unencodable_value_leaves_no_id_gap():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        wal = WAL(os.path.join(temp_dir, "wal.log"))
+
+        # orjson only encodes integers up to 64 bits
+        with pytest.raises(orjson.JSONEncodeError):
+            wal.append(OperationType.SET, "big", 2**70)
+
+        assert wal.get_last_id() == 0
+        assert wal.append(OperationType.SET, "small", 1).id == 1
+        wal.close()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), {"nested": [1.0, float("-inf")]}])
+def test_wal_append_rejects_non_finite_floats(value):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        wal = WAL(os.path.join(temp_dir, "wal.log"))
+
+        # orjson would write these as null, storing a different value than the one written
+        with pytest.raises(orjson.JSONEncodeError):
+            wal.append(OperationType.SET, "float", value)
+
+        assert wal.get_last_id() == 0
+        assert wal.append(OperationType.SET, "nullable", [None, 1.5]).id == 1
+        wal.close()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_log_entry_caches_json_bytes():
+    entry = LogEntry(id=1, operation=OperationType.SET, key="k", value="v")
+
+    encoded = entry.to_json_bytes()
+    assert orjson.loads(encoded) == entry.to_raw_dict()
+    assert entry.to_json_bytes() is encoded
+
+    # Reassigning any field, the CRC included, invalidates the cached bytes
+    entry.crc = entry.calculate_crc()
+    assert orjson.loads(entry.to_json_bytes())["crc"] == entry.crc
+    entry.value = "changed"
+    assert orjson.loads(entry.to_json_bytes())["value"] == "changed"
+
+
+def test_log_entry_batch_validates_raw_entries_json():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        wal = WAL(os.path.join(temp_dir, "wal.log"))
+        wal.append(OperationType.SET, "key1", {"nested": [1, 2]})
+        wal.append(OperationType.DELETE, "key1")
+
+        # Entries served as raw dicts are validated straight from the JSON bytes, keeping their CRCs intact
+        batch = LogEntryBatch.model_validate_json(orjson.dumps({"entries": list(wal.iter_raw_from(0))}))
+        assert [entry.id for entry in batch.entries] == [1, 2]
+        assert batch.entries[0].value == {"nested": [1, 2]}
+        assert all(entry.validate_crc() for entry in batch.entries)
+
     finally:
         shutil.rmtree(temp_dir)
@@ -0,0 +1,143 @@
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from pydistributedkv.domain import models
+from pydistributedkv.domain.models import LogEntry, OperationType, WAL
+
+
+class TestWALGroupCommit(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.wal_path = os.path.join(self.temp_dir, "wal.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_concurrent_appends_share_fsyncs(self):
+        """Concurrent appends should all be durable, with fewer fsyncs than appends"""
+        wal = WAL(self.wal_path, group_commit_delay=0.005)
+
+        with patch("pydistributedkv.domain.models._fdatasync", wraps=models._fdatasync) as mock_fsync:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                entries = list(executor.map(lambda i: wal.append(OperationType.SET, f"key{i}", i), range(40)))
+
+        self.assertEqual(sorted(entry.id for entry in entries), list(range(1, 41)))
+        self.assertLess(mock_fsync.call_count, 40)
+
+        # Entries are on disk in ID order, and survive a restart
+        self.assertEqual([entry.id for entry in wal.read_from(0)], list(range(1, 41)))
+        wal.close()
+        reopened = WAL(self.wal_path)
+        self.assertEqual(reopened.get_last_id(), 40)
+        reopened.close()
+
+    def test_concurrent_appends_roll_segments(self):
+        """Segment rollover should stay consistent when appends are batched"""
+        wal = WAL(self.wal_path, max_segment_size=200, fsync=False)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda i: wal.append(OperationType.SET, f"key{i}", i), range(20)))
+
+        self.assertGreater(len(wal.get_segment_files()), 1)
+        for segment in wal.get_segment_files()[:-1]:
+            self.assertLessEqual(os.path.getsize(segment), 200)
+        self.assertEqual([entry.id for entry in wal.read_from(0)], list(range(1, 21)))
+        wal.close()
+
+    def test_short_writes_are_resumed(self):
+        """Batched writes should resume where a short writev left off"""
+        wal = WAL(self.wal_path, fsync=False)
+
+        def short_writev(fd, buffers):
+            return os.write(fd, bytes(buffers[0][:5]))
+
+        with patch("pydistributedkv.domain.models._writev", side_effect=short_writev):
+            wal.append(OperationType.SET, "key1", "value1")
+            wal.append(OperationType.SET, "key2", "value2")
+
+        self.assertEqual([entry.key for entry in wal.read_from(0)], ["key1", "key2"])
+        wal.close()
+
+    def test_append_entries_commits_batch_once(self):
+        """A replicated batch should be written with a single fsync, skipping entries that already exist"""
+        wal = WAL(self.wal_path)
+        wal.append(OperationType.SET, "existing", 0)
+        entries = [LogEntry(id=i, operation=OperationType.SET, key=f"key{i}", value=i) for i in range(1, 6)]
+
+        with patch("pydistributedkv.domain.models._fdatasync", wraps=models._fdatasync) as mock_fsync:
+            new_entries = wal.append_entries(entries)
+
+        self.assertEqual([entry.id for entry in new_entries], [2, 3, 4, 5])
+        self.assertEqual(mock_fsync.call_count, 1)
+        self.assertTrue(all(entry.validate_crc() for entry in new_entries))
+        self.assertEqual([entry.key for entry in wal.read_from(0)], ["existing", "key2", "key3", "key4", "key5"])
+        wal.close()
+
+    def test_append_entries_rolls_segments_within_batch(self):
+        """A batch larger than a segment should be split across segments in order"""
+        wal = WAL(self.wal_path, max_segment_size=200, fsync=False)
+        entries = [LogEntry(id=i, operation=OperationType.SET, key=f"key{i}", value=i) for i in range(1, 11)]
+
+        wal.append_entries(entries)
+
+        segments = wal.get_segment_files()
+        self.assertGreater(len(segments), 1)
+        for segment in segments[:-1]:
+            self.assertLessEqual(os.path.getsize(segment), 200)
+        self.assertEqual([entry.id for entry in wal.read_from(0)], list(range(1, 11)))
+        wal.close()
+
+    def test_failed_write_leaves_entries_unstored(self):
+        """A write that fails should leave its entries out of the WAL, so a retry stores them"""
+        wal = WAL(self.wal_path, fsync=False)
+        wal.append(OperationType.SET, "existing", 0)
+        size_before = os.path.getsize(wal.get_active_segment())
+        entry = LogEntry(id=7, operation=OperationType.SET, key="key7", value=7)
+
+        def partial_writev(fd, buffers):
+            os.write(fd, bytes(buffers[0][:5]))
+            raise OSError("disk full")
+
+        with patch("pydistributedkv.domain.models._writev", side_effect=partial_writev):
+            with self.assertRaises(OSError):
+                wal.append_entries([entry])
+
+        # The torn line was truncated off and the entry is not considered stored
+        self.assertFalse(wal.has_entry(7))
+        self.assertEqual(os.path.getsize(wal.get_active_segment()), size_before)
+
+        self.assertEqual([e.id for e in wal.append_entries([entry])], [7])
+        self.assertEqual([e.key for e in wal.read_from(0)], ["existing", "key7"])
+        wal.close()
+        reopened = WAL(self.wal_path)
+        self.assertTrue(reopened.has_entry(7))
+        reopened.close()
+
+    def test_failed_append_does_not_use_up_its_id(self):
+        """A failed append should not leave a gap in the ID sequence"""
+        wal = WAL(self.wal_path, fsync=False)
+        wal.append(OperationType.SET, "key1", 1)
+
+        with patch("pydistributedkv.domain.models._writev", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                wal.append(OperationType.SET, "key2", 2)
+
+        self.assertEqual(wal.append(OperationType.SET, "key2", 2).id, 2)
+        wal.close()
+
+    def test_unexpected_commit_error_reaches_the_writer(self):
+        """An error other than OSError should fail the write instead of stopping the commit thread"""
+        wal = WAL(self.wal_path, fsync=False)
+
+        with patch("pydistributedkv.domain.models._writev", side_effect=ValueError("bad buffer")):
+            with self.assertRaises(ValueError):
+                wal.append(OperationType.SET, "key1", 1)
+
+        # The committer is still running
+        self.assertEqual(wal.append(OperationType.SET, "key1", 1).id, 1)
+        self.assertEqual([e.id for e in wal.read_from(0)], [1])
+        wal.close()
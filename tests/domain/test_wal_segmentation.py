@@ -3,9 +3,13 @@ import os
 import shutil
 import tempfile
 import unittest
+from concurrent.futures import ProcessPoolExecutor
 from unittest.mock import patch
 
-from pydistributedkv.domain.models import LogEntry, OperationType, WAL
+import orjson
+
+from pydistributedkv.domain import models
+from pydistributedkv.domain.models import LineCheckpoints, LogEntry, OperationType, WAL
 from pydistributedkv.service.storage import KeyValueStorage
 
 
@@ -35,6 +39,26 @@ class TestWALSegmentation(unittest.TestCase):
         active_segment = wal.get_active_segment()
         self.assertEqual(active_segment, segments[0])
 
+    def test_segments_sorted_numerically(self):
+        """Test that segment discovery orders by number and ignores unrelated files"""
+        for name in ("wal.log.segment.10", "wal.log.segment.9", "wal.log.segment.tmp", "wal.log.index"):
+            open(os.path.join(self.temp_dir, name), "wb").close()
+
+        wal = WAL(self.wal_path, max_segment_size=self.small_segment_size)
+
+        self.assertEqual([os.path.basename(s) for s in wal.get_segment_files()], ["wal.log.segment.9", "wal.log.segment.10"])
+        self.assertEqual(wal.get_active_segment(), os.path.join(self.temp_dir, "wal.log.segment.10"))
+
+    def test_segment_sizes_match_files(self):
+        """Test that the segment sizes tracked in memory match the files on disk"""
+        wal = WAL(self.wal_path, max_segment_size=self.small_segment_size)
+        for i in range(5):
+            wal.append(OperationType.SET, f"key{i}", f"value{i}")
+
+        sizes = wal.get_segment_sizes()
+        self.assertEqual([segment for segment, _ in sizes], wal.get_segment_files())
+        self.assertEqual([size for _, size in sizes], [os.path.getsize(segment) for segment in wal.get_segment_files()])
+
     def test_segment_rollover(self):
         """Test that new segments are created when size limit is reached"""
         wal = WAL(self.wal_path, max_segment_size=self.small_segment_size)
@@ -217,21 +241,225 @@ class TestWALSegmentation(unittest.TestCase):
                 f.writelines(lines)
 
         # Create a new WAL instance that will replay the log and capture print statements
-        with patch("builtins.print") as mock_print:
+        with self.assertLogs("pydistributedkv.domain.models", level="WARNING") as logs:
             new_wal = WAL(self.wal_path, max_segment_size=self.small_segment_size)
             # Explicitly read all entries to trigger validation
             entries = new_wal.read_from(0)
 
-        # Verify warning was printed about invalid CRC or skipping entries
-        crc_warning_printed = False
-        for call in mock_print.call_args_list:
-            call_args = " ".join(str(arg) for arg in call[0])
-            if "invalid CRC" in call_args.lower() or "skipping" in call_args.lower() or "crc validation" in call_args.lower():
-                crc_warning_printed = True
-                break
-
-        self.assertTrue(crc_warning_printed, "Expected CRC validation warning")
+        # Verify a warning was logged about invalid CRC or skipping entries
+        crc_warning_logged = any("invalid crc" in message.lower() or "crc validation" in message.lower() for message in logs.output)
+        self.assertTrue(crc_warning_logged, "Expected CRC validation warning")
 
         # The WAL should still initialize and contain valid entries
         entries = new_wal.read_from(0)
         self.assertGreater(len(entries), 0, "Expected some valid entries despite corruption")
+
+    def test_segment_index_restores_sealed_segments(self):
+        """Test that sealed segments are restored from the sidecar index without rescanning them"""
+        wal = WAL(self.wal_path, max_segment_size=self.small_segment_size)
+        for i in range(10):
+            wal.append(OperationType.SET, f"key{i}", f"value{i}")
+
+        self.assertGreater(len(wal.get_segment_files()), 2, "Expected multiple sealed segments for this test")
+        self.assertTrue(os.path.exists(wal.index_path))
+
+        with patch.object(WAL, "_read_valid_entry_ids", autospec=True, side_effect=WAL._read_valid_entry_ids) as mock_read:
+            new_wal = WAL(self.wal_path, max_segment_size=self.small_segment_size)
+
+        # Only the active segment has been scanned
+        scanned = [call.args[1] for call in mock_read.call_args_list]
+        self.assertEqual(scanned, [new_wal.get_active_segment()])
+
+        self.assertEqual(new_wal.get_last_id(), 10)
+        for entry_id in range(1, 11):
+            self.assertTrue(new_wal.has_entry(entry_id), f"Entry {entry_id} should exist")
+        self.assertFalse(new_wal.has_entry(11))
+
+        # Replicated entries that already exist in sealed segments are skipped
+        duplicate = LogEntry(id=1, operation=OperationType.SET, key="other", value="other")
+        new_wal.append_entry(duplicate)
+        self.assertEqual(new_wal.read_from(1)[0].key, "key0")
+
+    def test_segment_index_rescans_modified_segment(self):
+        """Test that a sealed segment changed after indexing is rescanned on startup"""
+        wal = WAL(self.wal_path, max_segment_size=self.small_segment_size)
+        for i in range(10):
+            wal.append(OperationType.SET, f"key{i}", f"value{i}")
+
+        # Drop the only entry of the first sealed segment
+        first_segment = wal.get_segment_files()[0]
+        with open(first_segment, "w"):
+            pass
+
+        new_wal = WAL(self.wal_path, max_segment_size=self.small_segment_size)
+        self.assertFalse(new_wal.has_entry(1))
+        self.assertTrue(new_wal.has_entry(2))
+
+    def test_compaction_keeps_latest_entries_in_id_order(self):
+        """Compaction should keep each key's latest entry in ID order, deletes of keys it has no SET for included"""
+        wal = WAL(self.wal_path, max_segment_size=self.small_segment_size)
+
+        wal.append(OperationType.SET, "a", 1)
+        wal.append(OperationType.SET, "b", 2)
+        wal.append(OperationType.SET, "a", 3)
+        wal.append(OperationType.DELETE, "missing")
+        wal.append(OperationType.DELETE, "b")
+        # Start a fresh active segment so everything above is eligible for compaction
+        wal._roll_segment_if_needed(self.small_segment_size)
+        wal.append(OperationType.SET, "c", 4)
+
+        wal.compact_segments()
+
+        entries = wal.read_from(0)
+        self.assertEqual([(e.key, e.id) for e in entries], [("a", 3), ("missing", 4), ("b", 5), ("c", 6)])
+        self.assertEqual(entries[2].operation, OperationType.DELETE)
+
+    def test_compaction_keeps_highest_id_for_out_of_order_entries(self):
+        """Compaction should keep the highest ID per key even when a follower wrote an older entry after it"""
+        wal = WAL(self.wal_path, max_segment_size=self.small_segment_size)
+
+        for entry_id, operation, key, value in [
+            (5, OperationType.SET, "k", "new"),
+            (3, OperationType.SET, "k", "old"),
+            (6, OperationType.DELETE, "gone", None),
+            (4, OperationType.SET, "gone", "late"),
+        ]:
+            entry = LogEntry(id=entry_id, operation=operation, key=key, value=value)
+            entry.crc = entry.calculate_crc()
+            wal.append_entry(entry)
+        wal._roll_segment_if_needed(self.small_segment_size)
+        wal.append(OperationType.SET, "c", 7)
+
+        wal.compact_segments()
+
+        entries = wal.read_from(0)
+        self.assertEqual([(e.id, e.key, e.value) for e in entries], [(5, "k", "new"), (6, "gone", None), (7, "c", 7)])
+        self.assertEqual(entries[1].operation, OperationType.DELETE)
+
+    def test_index_rebuild_after_compaction_skips_decoding(self):
+        """Rebuilding the index after compaction should read IDs without decoding the compacted lines"""
+        wal = WAL(self.wal_path, max_segment_size=self.small_segment_size)
+        for i in range(10):
+            wal.append(OperationType.SET, f"key{i % 3}", i)
+
+        with patch("pydistributedkv.domain.models.orjson.loads", wraps=orjson.loads) as mock_loads:
+            wal._rebuild_segment_index()
+        mock_loads.assert_not_called()
+
+        wal.compact_segments()
+        self.assertEqual(wal.existing_ids.max(), 10)
+        reopened = WAL(self.wal_path, max_segment_size=self.small_segment_size)
+        self.assertEqual([e.key for e in reopened.read_from(0)][-3:], ["key1", "key2", "key0"])
+
+    def test_missing_index_rescans_segments_in_parallel(self):
+        """Test that many stale sealed segments are rescanned in worker processes with CRC validation"""
+        wal = WAL(self.wal_path, max_segment_size=self.small_segment_size)
+        for i in range(10):
+            wal.append(OperationType.SET, f"key{i}", f"value{i}")
+        wal.close()
+
+        # Corrupt the entry in the second sealed segment and lose the index
+        second_segment = wal.get_segment_files()[1]
+        with open(second_segment, "r") as f:
+            entry = json.loads(f.readline())
+        entry["value"] = "corrupted_value"
+        with open(second_segment, "w") as f:
+            f.write(json.dumps(entry) + "\n")
+        os.remove(wal.index_path)
+
+        with patch("pydistributedkv.domain.models.ProcessPoolExecutor", wraps=ProcessPoolExecutor) as mock_pool:
+            new_wal = WAL(self.wal_path, max_segment_size=self.small_segment_size)
+
+        mock_pool.assert_called_once()
+        self.assertEqual(new_wal.get_last_id(), 10)
+        self.assertFalse(new_wal.has_entry(entry["id"]))
+        self.assertEqual(len(new_wal.existing_ids), 9)
+        self.assertTrue(os.path.exists(new_wal.index_path))
+
+    def test_iter_from_skips_segments_before_start_id(self):
+        """Test that iterating from an ID only reads segments that can contain it"""
+        wal = WAL(self.wal_path, max_segment_size=self.small_segment_size)
+        for i in range(10):
+            wal.append(OperationType.SET, f"key{i}", f"value{i}")
+
+        with patch.object(WAL, "_read_segment_dicts", autospec=True, side_effect=WAL._read_segment_dicts) as mock_read:
+            entries = wal.iter_from(9)
+            self.assertEqual([entry.id for entry in entries], [9, 10])
+
+        read_segments = [call.args[1] for call in mock_read.call_args_list]
+        self.assertLess(len(read_segments), len(wal.get_segment_files()))
+        self.assertIn(wal.get_active_segment(), read_segments)
+
+    def test_sealed_segment_crc_skips_entry_validation(self):
+        """Test that sealed segments matching their whole-file CRC are read without per-entry CRC checks"""
+        wal = WAL(self.wal_path, max_segment_size=self.small_segment_size)
+        for i in range(10):
+            wal.append(OperationType.SET, f"key{i}", f"value{i}")
+        active_entries = len(wal.read_from(wal.get_last_id()))
+
+        with patch("pydistributedkv.domain.models._validate_crc", wraps=models._validate_crc) as mock_validate:
+            entries = wal.read_from(0)
+
+        self.assertEqual([entry.id for entry in entries], list(range(1, 11)))
+        self.assertEqual(mock_validate.call_count, active_entries)
+
+    def test_sealed_segment_crc_mismatch_validates_entries(self):
+        """Test that a sealed segment changed after sealing falls back to per-entry CRC checks"""
+        wal = WAL(self.wal_path, max_segment_size=self.small_segment_size)
+        for i in range(10):
+            wal.append(OperationType.SET, f"key{i}", f"value{i}")
+        first_segment = wal.get_segment_files()[0]
+
+        # Same length, so only the content differs from what was sealed
+        with open(first_segment, "rb") as f:
+            data = f.read()
+        with open(first_segment, "wb") as f:
+            f.write(data.replace(b'"value0"', b'"valueX"', 1))
+
+        with self.assertLogs("pydistributedkv.domain.models", level="WARNING"):
+            entries = wal.read_from(0)
+
+        self.assertEqual([entry.id for entry in entries], list(range(2, 11)))
+
+    def test_read_from_starts_at_checkpoint_within_segment(self):
+        """Test that reading recent IDs skips the earlier lines of a segment instead of decoding them"""
+        wal = WAL(self.wal_path)
+        for i in range(300):
+            wal.append(OperationType.SET, f"key{i}", f"value{i}")
+
+        with patch.object(WAL, "_decode_log_entry", autospec=True, side_effect=WAL._decode_log_entry) as mock_decode:
+            entries = wal.read_from(290)
+
+        self.assertEqual([entry.id for entry in entries], list(range(290, 301)))
+        self.assertLessEqual(mock_decode.call_count, LineCheckpoints.CHECKPOINT_INTERVAL + 11)
+
+    def test_checkpoints_handle_out_of_order_entries(self):
+        """Test that a late entry with a low ID is still found when reading past earlier checkpoints"""
+        wal = WAL(self.wal_path)
+        entries = [LogEntry(id=i, operation=OperationType.SET, key=f"key{i}", value=f"value{i}") for i in range(2, 202)]
+        entries.append(LogEntry(id=1, operation=OperationType.SET, key="key1", value="value1"))
+        for entry in entries:
+            entry.crc = entry.calculate_crc()
+        wal.append_entries(entries)
+
+        self.assertEqual([entry.id for entry in wal.read_from(1)], list(range(1, 202)))
+        self.assertEqual([entry.id for entry in wal.read_from(150)], list(range(150, 202)))
+
+    def test_failed_rollover_keeps_current_segment(self):
+        """Test that appends stay in the active segment when the next one cannot be created"""
+        wal = WAL(self.wal_path, max_segment_size=self.small_segment_size)
+        wal.append(OperationType.SET, "key0", "value0")
+        active_segment = wal.get_active_segment()
+
+        with (
+            self.assertLogs("pydistributedkv.domain.models", level="ERROR"),
+            patch.object(WAL, "_open_segment_for_append", side_effect=OSError("disk full")),
+        ):
+            wal.append(OperationType.SET, "key1", "value1")
+
+        self.assertEqual(wal.get_segment_files(), [active_segment])
+        self.assertEqual([entry.key for entry in wal.read_from(0)], ["key0", "key1"])
+
+        # The next append rolls over once segments can be created again
+        wal.append(OperationType.SET, "key2", "value2")
+        self.assertEqual(len(wal.get_segment_files()), 2)
@@ -0,0 +1,90 @@
+import asyncio
+import importlib
+import logging
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+
+from pydistributedkv.domain.models import LogEntry, OperationType
+
+
+@pytest.fixture
+def follower(tmp_path, monkeypatch):
+    """A fresh follower app with its WAL in a temporary directory"""
+    monkeypatch.setenv("WAL_PATH", str(tmp_path / "wal.log"))
+    module = importlib.reload(importlib.import_module("pydistributedkv.entrypoints.web.follower.follower"))
+    monkeypatch.setattr(module, "_start_catch_up", MagicMock())
+    yield module
+    module.wal.close()
+
+
+def make_entry(entry_id: int, operation: OperationType, key: str, value=None, version=None) -> dict:
+    entry = LogEntry(id=entry_id, operation=operation, key=key, value=value, version=version)
+    entry.crc = entry.calculate_crc()
+    return entry.to_raw_dict()
+
+
+async def replicate(follower, *entries: dict) -> httpx.Response:
+    transport = httpx.ASGITransport(app=follower.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://follower") as client:
+        return await client.post("/replicate", json={"entries": list(entries)})
+
+
+@pytest.mark.asyncio
+async def test_batch_arriving_before_an_earlier_one_is_rejected(follower):
+    """Test that a DELETE overtaking its SET is only applied after it, leaving the key deleted as on the leader"""
+    set_entry = make_entry(1, OperationType.SET, "k", "v")
+    delete_entry = make_entry(2, OperationType.DELETE, "k")
+
+    response = await replicate(follower, delete_entry)
+    assert response.status_code == 409
+    assert not follower.wal.has_entry(2)
+    follower._start_catch_up.assert_called_once()
+
+    assert (await replicate(follower, set_entry)).status_code == 200
+    assert follower.storage.get("k") == "v"
+
+    response = await replicate(follower, delete_entry)
+    assert response.status_code == 200
+    assert response.json()["last_applied_id"] == 2
+    assert follower.storage.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_batch_with_a_gap_inside_is_rejected(follower):
+    """Test that a batch missing an entry between its own is not applied"""
+    response = await replicate(follower, make_entry(1, OperationType.SET, "a", 1), make_entry(3, OperationType.SET, "a", 3))
+
+    assert response.status_code == 409
+    assert follower.wal.get_last_id() == 0
+
+
+@pytest.mark.asyncio
+async def test_batch_overlapping_stored_entries_is_applied(follower):
+    """Test that a retried batch partly stored already applies only its new entries"""
+    first = make_entry(1, OperationType.SET, "a", 1, version=1)
+    assert (await replicate(follower, first)).status_code == 200
+
+    response = await replicate(follower, first, make_entry(2, OperationType.SET, "a", 2, version=2))
+
+    assert response.status_code == 200
+    assert follower.storage.get("a") == 2
+    follower._start_catch_up.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_failed_catch_up_is_logged(follower, caplog):
+    """Test that a catch-up sync ending with an unexpected error logs it instead of leaving it unretrieved"""
+
+    async def failing_sync():
+        raise OSError("disk full")
+
+    task = asyncio.create_task(failing_sync())
+    task.add_done_callback(follower._log_catch_up_failure)
+    with caplog.at_level(logging.ERROR):
+        await asyncio.wait([task])
+        await asyncio.sleep(0)
+
+    assert "Catch-up sync with leader" in caplog.text
+    assert "disk full" in caplog.text
@@ -112,7 +112,7 @@ class TestLogCompactionService:
         # Start the service
         with mock.patch("pydistributedkv.service.compaction.logger.info") as mock_info:
             await compaction_service.start()
-            mock_info.assert_called_with(f"Started log compaction service (interval: {compaction_service.compaction_interval}s)")
+            mock_info.assert_called_with("Started log compaction service (interval: %ss)", compaction_service.compaction_interval)
 
         # Task should have been created
         assert compaction_service.compaction_task is not None
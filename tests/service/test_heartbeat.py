@@ -2,8 +2,10 @@ import asyncio
 import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
 
+from pydistributedkv.configurator.settings.base import HEARTBEAT_TIMEOUT
 from pydistributedkv.service.heartbeat import HeartbeatService
 
 # Test constants
@@ -167,6 +169,22 @@ def test_get_healthy_servers(heartbeat_service):
     assert healthy_servers["server1"] == "http://server1:8001"
 
 
+def test_get_healthy_servers_reuses_snapshot_until_status_changes(heartbeat_service):
+    """Test that the healthy servers are only recomputed after a server is added or changes status"""
+    heartbeat_service.register_server("server1", "http://server1:8001")
+    healthy_servers = heartbeat_service.get_healthy_servers()
+    assert heartbeat_service.get_healthy_servers() is healthy_servers
+
+    heartbeat_service._update_server_status("server1", heartbeat_service.servers["server1"], HEARTBEAT_TIMEOUT + 1)
+    assert heartbeat_service.get_healthy_servers() == {}
+
+    heartbeat_service.record_heartbeat("server1")
+    assert heartbeat_service.get_healthy_servers() == {"server1": "http://server1:8001"}
+
+    heartbeat_service.register_server("server2", "http://server2:8002")
+    assert set(heartbeat_service.get_healthy_servers()) == {"server1", "server2"}
+
+
 @pytest.mark.asyncio
 async def test_start_monitoring():
     """Test starting heartbeat monitoring"""
@@ -257,10 +275,10 @@ async def test_monitor_heartbeats_marks_server_down():
         service.register_server(OTHER_SERVER_ID, OTHER_SERVER_URL)
 
         # Set last_heartbeat far in the past to trigger the timeout
-        service.servers[OTHER_SERVER_ID]["last_heartbeat"] = time.time() - 1.0
+        service.servers[OTHER_SERVER_ID]["last_heartbeat"] = time.monotonic() - 1.0
 
         # Directly call the check method to test its behavior
-        service._check_server_heartbeats(time.time())
+        service._check_server_heartbeats(time.monotonic())
 
         # Verify server is marked down
         assert service.servers[OTHER_SERVER_ID]["status"] == "down"
@@ -274,17 +292,16 @@ async def test_send_heartbeats_to_all_servers():
     service.register_server("server1", "http://server1:8001")
     service.register_server("server2", "http://server2:8002")
 
-    # Mock _schedule_heartbeat to test if it's called for each server
-    with patch.object(service, "_schedule_heartbeat") as mock_schedule:
+    # Mock _send_single_heartbeat to test if it's called for each server
+    with patch.object(service, "_send_single_heartbeat", new_callable=AsyncMock) as mock_send:
         # When
         await service._send_heartbeats_to_all_servers()
 
         # Then
-        assert mock_schedule.call_count == 2
+        assert mock_send.await_count == 2
         # Check that it was called for each server
-        calls = mock_schedule.call_args_list
-        servers_called = {call.args[0] for call in calls}
-        assert servers_called == {"server1", "server2"}
+        calls = mock_send.call_args_list
+        assert {call.args for call in calls} == {("server1", "http://server1:8001"), ("server2", "http://server2:8002")}
 
 
 @pytest.mark.asyncio
@@ -297,16 +314,16 @@ async def test_send_single_heartbeat_success():
     mock_response = MagicMock()
     mock_response.status_code = 200
 
-    # Mock asyncio.to_thread to return our mock response
-    with patch("asyncio.to_thread", return_value=mock_response) as mock_to_thread:
+    # Mock the pooled client's post to return our mock response
+    with patch.object(service._client, "post", new_callable=AsyncMock, return_value=mock_response) as mock_post:
         # When
         await service._send_single_heartbeat(OTHER_SERVER_ID, OTHER_SERVER_URL)
 
         # Then
-        mock_to_thread.assert_called_once()
+        mock_post.assert_awaited_once()
         # Check that the heartbeat URL is correct
-        call_args = mock_to_thread.call_args
-        assert f"{OTHER_SERVER_URL}/heartbeat" in call_args.args[1]
+        call_args = mock_post.call_args
+        assert call_args.args[0] == f"{OTHER_SERVER_URL}/heartbeat"
         # Check that the server_id is included in the payload
         assert call_args.kwargs["json"]["server_id"] == SERVER_ID
 
@@ -321,13 +338,13 @@ async def test_send_single_heartbeat_failure():
     mock_response = MagicMock()
     mock_response.status_code = 500
 
-    # Mock asyncio.to_thread to return our mock response
-    with patch("asyncio.to_thread", return_value=mock_response) as mock_to_thread:
+    # Mock the pooled client's post to return our mock response
+    with patch.object(service._client, "post", new_callable=AsyncMock, return_value=mock_response) as mock_post:
         # When
         await service._send_single_heartbeat(OTHER_SERVER_ID, OTHER_SERVER_URL)
 
         # Then
-        mock_to_thread.assert_called_once()
+        mock_post.assert_awaited_once()
         # No exception should be raised
 
 
@@ -337,29 +354,37 @@ async def test_send_single_heartbeat_network_error():
     # Given
     service = HeartbeatService(SERVICE_NAME, SERVER_ID, SERVER_URL)
 
-    # Mock asyncio.to_thread to raise a RequestException
-    import requests
-
-    with patch("asyncio.to_thread", side_effect=requests.RequestException("Network error")):
+    # Mock the pooled client's post to raise a transport error
+    with patch.object(service._client, "post", new_callable=AsyncMock, side_effect=httpx.ConnectError("Network error")):
         # When/Then - should not raise exception outside
         await service._send_single_heartbeat(OTHER_SERVER_ID, OTHER_SERVER_URL)
         # No assertion needed - we're testing that no exception is raised
 
 
-@pytest.mark.asyncio
-async def test_schedule_heartbeat():
-    """Test scheduling a heartbeat to a server"""
+def test_get_all_statuses_reports_wall_clock_time(heartbeat_service):
+    """Test that statuses report wall clock heartbeat times while tracking them on the monotonic clock"""
     # Given
-    service = HeartbeatService(SERVICE_NAME, SERVER_ID, SERVER_URL)
+    heartbeat_service.register_server(OTHER_SERVER_ID, OTHER_SERVER_URL)
+    heartbeat_service.servers[OTHER_SERVER_ID]["last_heartbeat"] = time.monotonic() - 5.0
+
+    # When
+    status = heartbeat_service.get_all_statuses()[OTHER_SERVER_ID]
 
-    # Mock asyncio.create_task to verify it's called with a coroutine
-    mock_task = MagicMock()
+    # Then
+    assert status["seconds_since_last_heartbeat"] == pytest.approx(5.0, abs=0.5)
+    assert status["last_heartbeat"] == pytest.approx(time.time() - 5.0, abs=0.5)
 
-    with patch("asyncio.create_task", return_value=mock_task) as mock_create_task:
-        # Mock _send_single_heartbeat to verify it's called
-        with patch.object(service, "_send_single_heartbeat", return_value=AsyncMock()):
-            # When
-            service._schedule_heartbeat(OTHER_SERVER_ID, {"url": OTHER_SERVER_URL})
 
-            # Then
-            mock_create_task.assert_called_once()
+@pytest.mark.asyncio
+async def test_restarted_service_sends_with_an_open_client():
+    """Test that sending can be started again after stop() closed the HTTP client"""
+    service = HeartbeatService(service_name="test", server_id=SERVER_ID, server_url=SERVER_URL)
+    await service.start_sending()
+    await service.stop()
+    assert service._client.is_closed
+
+    await service.start_sending()
+    try:
+        assert not service._client.is_closed
+    finally:
+        await service.stop()
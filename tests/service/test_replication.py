@@ -0,0 +1,354 @@
+import asyncio
+import time
+from collections import deque
+
+import httpx
+import orjson
+import pytest
+
+from pydistributedkv.domain.models import LogEntry, OperationType
+from pydistributedkv.service import replication
+from pydistributedkv.service.replication import FollowerQueue, ReplicationService
+
+FOLLOWERS = {"follower-1": "http://follower-1:8001"}
+
+
+def make_entry(entry_id: int) -> LogEntry:
+    entry = LogEntry(id=entry_id, operation=OperationType.SET, key=f"key{entry_id}", value=entry_id)
+    entry.crc = entry.calculate_crc()
+    return entry
+
+
+def make_service(handler, replicated: list, **kwargs) -> ReplicationService:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return ReplicationService(on_replicated=lambda follower_id, last_id: replicated.append((follower_id, last_id)), client=client, **kwargs)
+
+
+async def wait_for(condition, timeout: float = 1.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.001)
+
+
+@pytest.mark.asyncio
+async def test_entries_within_window_share_one_request():
+    """Test that entries queued together go out as one sorted batch"""
+    requests = []
+    replicated = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(orjson.loads(request.content))
+        return httpx.Response(200, json={"status": "ok"})
+
+    service = make_service(handler, replicated, batch_window=0.01)
+    await service.start()
+    try:
+        for entry_id in (2, 1, 3):
+            service.replicate(make_entry(entry_id), FOLLOWERS)
+        await wait_for(lambda: replicated)
+
+        assert len(requests) == 1
+        assert [entry["id"] for entry in requests[0]["entries"]] == [1, 2, 3]
+        assert replicated == [("follower-1", 3)]
+    finally:
+        await service.stop()
+
+
+@pytest.mark.asyncio
+async def test_batches_are_capped_at_max_batch():
+    """Test that a backlog is split into batches of at most max_batch entries"""
+    batch_sizes = []
+    replicated = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        batch_sizes.append(len(orjson.loads(request.content)["entries"]))
+        return httpx.Response(200, json={"status": "ok"})
+
+    service = make_service(handler, replicated, batch_window=0.01, max_batch=2)
+    await service.start()
+    try:
+        for entry_id in range(1, 6):
+            service.replicate(make_entry(entry_id), FOLLOWERS)
+        await wait_for(lambda: len(replicated) == 3)
+
+        assert batch_sizes == [2, 2, 1]
+        assert max(last_id for _, last_id in replicated) == 5
+    finally:
+        await service.stop()
+
+
+@pytest.mark.asyncio
+async def test_batches_are_pipelined_up_to_max_in_flight():
+    """Test that later batches are sent before earlier ones are acknowledged, up to max_in_flight"""
+    release = asyncio.Event()
+    sent = []
+    replicated = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(orjson.loads(request.content)["entries"][0]["id"])
+        await release.wait()
+        return httpx.Response(200, json={"status": "ok"})
+
+    service = make_service(handler, replicated, batch_window=0, max_batch=1, max_in_flight=2)
+    await service.start()
+    try:
+        for entry_id in (1, 2, 3):
+            service.replicate(make_entry(entry_id), FOLLOWERS)
+        await wait_for(lambda: len(sent) == 2)
+        await asyncio.sleep(0.01)
+
+        # The third batch waits for a free slot
+        assert sent == [1, 2]
+        assert replicated == []
+
+        release.set()
+        await wait_for(lambda: len(replicated) == 3)
+        assert sent == [1, 2, 3]
+    finally:
+        await service.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_not_recorded():
+    """Test that a batch the follower rejects does not advance its replication status"""
+    replicated = []
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request.url)
+        return httpx.Response(500)
+
+    service = make_service(handler, replicated, batch_window=0)
+    await service.start()
+    try:
+        service.replicate(make_entry(1), FOLLOWERS)
+        await wait_for(lambda: attempts)
+        await asyncio.sleep(0.01)
+
+        assert str(attempts[0]) == "http://follower-1:8001/replicate"
+        assert replicated == []
+    finally:
+        await service.stop()
+
+
+@pytest.mark.asyncio
+async def test_rejected_batch_is_retried_before_later_batches(monkeypatch):
+    """Test that a rejected batch is sent again until accepted, and later batches only go out after it"""
+    monkeypatch.setattr(replication, "RETRY_INITIAL_DELAY", 0.001)
+    sent = []
+    replicated = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append([entry["id"] for entry in orjson.loads(request.content)["entries"]])
+        # The follower rejects the first two attempts, like a batch that arrived before a sync filled a gap
+        return httpx.Response(409 if len(sent) <= 2 else 200)
+
+    service = make_service(handler, replicated, batch_window=0, max_batch=1)
+    await service.start()
+    try:
+        for entry_id in (1, 2):
+            service.replicate(make_entry(entry_id), FOLLOWERS)
+        await wait_for(lambda: len(replicated) == 2)
+
+        assert sent == [[1], [1], [1], [2]]
+        assert replicated == [("follower-1", 1), ("follower-1", 2)]
+    finally:
+        await service.stop()
+
+
+def test_replicate_before_start_is_dropped():
+    """Test that entries are not queued while the service is not running"""
+    service = make_service(lambda request: httpx.Response(200), [])
+
+    service.replicate(make_entry(1), FOLLOWERS)
+
+    assert service._queues == {}
+
+
+def test_batch_delay_follows_round_trip_time():
+    """Test that a batch fills for half a round trip after the previous send, capped at the batch window"""
+    service = make_service(lambda request: httpx.Response(200), [], batch_window=0.05)
+    now = time.monotonic()
+
+    # No round trips measured yet, or the previous send long ago: send right away
+    assert service._batch_delay(deque(), now) == 0.0
+    assert service._batch_delay(deque([0.02]), now - 1.0) == 0.0
+
+    assert service._batch_delay(deque([0.02, 0.04]), now) == pytest.approx(0.015, abs=0.005)
+    assert service._batch_delay(deque([1.0]), now) == 0.05
+
+
+@pytest.mark.asyncio
+async def test_entry_is_encoded_once_for_all_followers(monkeypatch):
+    """Test that every follower receives the same entry, serialized only once"""
+    bodies = []
+    replicated = []
+    dumped = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(request.content)
+        return httpx.Response(200, json={"status": "ok"})
+
+    service = make_service(handler, replicated, batch_window=0)
+    entry = make_entry(1)
+    original_to_raw_dict = LogEntry.to_raw_dict
+    monkeypatch.setattr(LogEntry, "to_raw_dict", lambda self: dumped.append(self.id) or original_to_raw_dict(self))
+    await service.start()
+    try:
+        service.replicate(entry, {"follower-1": "http://follower-1:8001", "follower-2": "http://follower-2:8002"})
+        await wait_for(lambda: len(replicated) == 2)
+
+        assert dumped == [1]
+        assert bodies[0] == bodies[1]
+        assert orjson.loads(bodies[0]) == {"entries": [original_to_raw_dict(entry)]}
+    finally:
+        await service.stop()
+
+
+@pytest.mark.asyncio
+async def test_follower_that_is_no_longer_healthy_is_dropped(monkeypatch):
+    """Test that retries stop once the follower is not healthy anymore, dropping its queue and sender"""
+    monkeypatch.setattr(replication, "RETRY_INITIAL_DELAY", 0.001)
+    healthy = {"follower-1"}
+    attempts = []
+    replicated = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request.url)
+        raise httpx.ConnectError("follower is down", request=request)
+
+    service = make_service(handler, replicated, batch_window=0, is_healthy=lambda follower_id: follower_id in healthy)
+    await service.start()
+    try:
+        service.replicate(make_entry(1), FOLLOWERS)
+        await wait_for(lambda: len(attempts) >= 2)
+        # The follower never comes back, the heartbeat monitor marks it down
+        healthy.clear()
+        service.replicate(make_entry(2), FOLLOWERS)
+        await wait_for(lambda: "follower-1" not in service._queues)
+        dropped_after = len(attempts)
+        await asyncio.sleep(0.02)
+
+        assert len(attempts) == dropped_after
+        assert service._tasks == {}
+        assert replicated == []
+    finally:
+        await service.stop()
+
+
+@pytest.mark.asyncio
+async def test_follower_is_dropped_after_max_attempts(monkeypatch):
+    """Test that a healthy follower that never accepts a batch is given up on after RETRY_MAX_ATTEMPTS"""
+    monkeypatch.setattr(replication, "RETRY_INITIAL_DELAY", 0.001)
+    monkeypatch.setattr(replication, "RETRY_MAX_ATTEMPTS", 3)
+    attempts = []
+    replicated = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request.url)
+        return httpx.Response(500)
+
+    service = make_service(handler, replicated, batch_window=0)
+    await service.start()
+    try:
+        service.replicate(make_entry(1), FOLLOWERS)
+        await wait_for(lambda: "follower-1" not in service._queues)
+        await asyncio.sleep(0.01)
+
+        assert len(attempts) == 3
+        assert replicated == []
+
+        # New entries start a fresh sender, the follower may have registered again
+        service.replicate(make_entry(2), FOLLOWERS)
+        await wait_for(lambda: len(attempts) == 4)
+        assert "follower-1" in service._queues
+    finally:
+        await service.stop()
+
+
+@pytest.mark.asyncio
+async def test_restarted_service_replicates_with_an_open_client(monkeypatch):
+    """Test that replication works again after stop() closed the HTTP client"""
+    replicated = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"status": "ok"})
+
+    monkeypatch.setattr(ReplicationService, "_new_client", staticmethod(lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))))
+    service = make_service(handler, replicated, batch_window=0)
+    await service.start()
+    await service.stop()
+    assert service._client.is_closed
+
+    await service.start()
+    try:
+        service.replicate(make_entry(1), FOLLOWERS)
+        await wait_for(lambda: replicated)
+
+        assert not service._client.is_closed
+        assert replicated == [("follower-1", 1)]
+    finally:
+        await service.stop()
+
+
+@pytest.mark.asyncio
+async def test_unexpected_send_error_is_retried(monkeypatch):
+    """Test that an error other than an HTTP one is retried rather than ending the send task"""
+    monkeypatch.setattr(replication, "RETRY_INITIAL_DELAY", 0.001)
+    attempts = []
+    replicated = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request.url)
+        if len(attempts) == 1:
+            raise RuntimeError("unexpected")
+        return httpx.Response(200, json={"status": "ok"})
+
+    service = make_service(handler, replicated, batch_window=0)
+    await service.start()
+    try:
+        service.replicate(make_entry(1), FOLLOWERS)
+        await wait_for(lambda: replicated)
+
+        assert len(attempts) == 2
+        assert replicated == [("follower-1", 1)]
+    finally:
+        await service.stop()
+
+
+@pytest.mark.asyncio
+async def test_entries_queued_out_of_order_wait_for_the_missing_one(monkeypatch):
+    """Test that entries past the follower's next expected ID are held back until the missing one is queued"""
+    monkeypatch.setattr(replication, "REORDER_TIMEOUT", 1.0)
+    service = make_service(lambda request: httpx.Response(200), [], batch_window=0)
+    queue = FollowerQueue()
+    for entry_id in (2, 4, 1):
+        queue.put((entry_id, b"%d" % entry_id))
+
+    # Entry 3 is still on its way, so 4 stays queued
+    first = await service._next_batch(queue, deque(), 0.0)
+    assert [entry_id for entry_id, _ in first] == [1, 2]
+
+    second = asyncio.create_task(service._next_batch(queue, deque(), 0.0))
+    await asyncio.sleep(0.01)
+    assert not second.done()
+
+    queue.put((3, b"3"))
+    assert [entry_id for entry_id, _ in await second] == [3, 4]
+
+
+@pytest.mark.asyncio
+async def test_entries_are_sent_once_the_missing_one_times_out(monkeypatch):
+    """Test that held back entries go out after REORDER_TIMEOUT, leaving the gap to the follower's catch-up"""
+    monkeypatch.setattr(replication, "REORDER_TIMEOUT", 0.001)
+    service = make_service(lambda request: httpx.Response(200), [], batch_window=0)
+    queue = FollowerQueue()
+    queue.put((1, b"1"))
+    await service._next_batch(queue, deque(), 0.0)
+
+    queue.put((3, b"3"))
+    batch = await asyncio.wait_for(service._next_batch(queue, deque(), 0.0), 1.0)
+
+    assert [entry_id for entry_id, _ in batch] == [3]
+    assert queue.next_id == 4
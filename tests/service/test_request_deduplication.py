@@ -28,6 +28,14 @@ class TestRequestDeduplicationService:
         assert dedup_service.total_duplicates_detected == 1
         assert dedup_service.same_operation_duplicates == 1
 
+    def test_mark_processed_matches_client_request(self, dedup_service):
+        """Test that marking from plain identifiers caches under the same key as a ClientRequest"""
+        result = {"key": "test_key", "value": "test_value"}
+        dedup_service.mark_processed("client1", "req1", OperationType.GET, result, key="test_key")
+
+        assert dedup_service.get_processed_result("client1", "req1", OperationType.GET) == result
+        assert dedup_service.get_processed_result("client1", "req1", OperationType.SET) is None
+
     def test_operation_type_differentiation(self, dedup_service):
         """Test that different operation types with the same request ID are treated as different requests"""
         # Mark a GET request as processed
@@ -110,6 +118,20 @@ class TestRequestDeduplicationService:
         assert len(dedup_service.processed_requests) == 0
         assert dedup_service.total_cache_cleanups >= 1
 
+    @patch("time.time")
+    def test_expired_entry_is_not_returned_between_sweeps(self, mock_time, dedup_service):
+        """Test that sweeps are throttled, while an expired entry is still never returned"""
+        mock_time.return_value = 1000
+        dedup_service.mark_processed("client1", "req1", OperationType.GET, {"value": "test_value"}, key="test_key")
+
+        # Expired, but the next sweep is not due yet
+        dedup_service.expiry_seconds = 0.01
+        mock_time.return_value = 1000.05
+
+        assert dedup_service.get_processed_result("client1", "req1", OperationType.GET) is None
+        assert dedup_service.total_duplicates_detected == 0
+        assert len(dedup_service.processed_requests["client1"]) == 1
+
     def test_same_request_different_operations(self, dedup_service):
         """Test handling multiple operations on the same request ID"""
         # First operation: SET
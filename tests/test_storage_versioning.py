@@ -90,6 +90,7 @@ class TestStorageVersioning:
         history = storage.get_version_history("key1")
 
         assert history == {1: "value1", 2: "value2", 3: "value3"}
+        assert list(history) == [1, 2, 3]
 
     def test_get_version_history_nonexistent_key(self, storage):
         """Test getting history for a non-existent key returns None"""
@@ -126,3 +127,35 @@ class TestStorageVersioning:
         assert storage.get("key1") is None
         assert storage.get_version_history("key1") is None
         assert storage.get_latest_version("key1") is None
+
+    def test_get_all_keys_tracks_added_and_removed_keys(self, storage):
+        """Test that the cached key list is rebuilt only when keys are added or removed"""
+        storage.set("key1", "value1")
+        keys = storage.get_all_keys()
+        assert keys == ["key1"]
+
+        # Updating an existing key reuses the cached list
+        storage.set("key1", "value2")
+        assert storage.get_all_keys() is keys
+
+        storage.set("key2", "value1")
+        assert storage.get_all_keys() == ["key1", "key2"]
+
+        storage.delete("key1")
+        storage.apply_entries([LogEntry(id=100, operation=OperationType.DELETE, key="key2")])
+        assert storage.get_all_keys() == []
+
+    def test_get_all_keys_does_not_keep_a_list_outdated_while_building(self, storage):
+        """Test that a key added while the list is being built is not lost from later calls"""
+        storage.set("key1", "value1")
+
+        class RacingDict(dict):
+            def __iter__(self):
+                keys = list(super().__iter__())
+                # A writer adds a key after the reader listed the keys but before it cached them
+                storage._insert_key("key2", "value2", 1)
+                return iter(keys)
+
+        storage.data = RacingDict(storage.data)
+        assert storage.get_all_keys() == ["key1"]
+        assert storage.get_all_keys() == ["key1", "key2"]
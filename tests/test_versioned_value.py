@@ -94,3 +94,14 @@ class TestVersionedValue:
         assert vv.get_value(3) == "version3"
         assert vv.get_value(4) == "version4"
         assert vv.get_value() == "version4"
+
+    def test_update_caps_history(self):
+        """Test that the oldest versions are dropped once max_history is reached"""
+        vv = VersionedValue(current_version=1, value="version1")
+
+        for version in range(2, 6):
+            vv.update(f"version{version}", version, max_history=2)
+
+        assert vv.history == {3: "version3", 4: "version4"}
+        assert vv.get_value(version=5) == "version5"
+        assert vv.get_value(version=2) is None